@@ -1,11 +1,12 @@
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.test import Client, TestCase, override_settings
 
 from posts.tests import const
 
 User = get_user_model()
 
 
+@override_settings(ANONYMOUS_PAGE_CACHE_VIEWS=[])
 class AboutURLTests(TestCase):
 
     def setUp(self):
@@ -0,0 +1,12 @@
+from yatube.test_runner import TEST_SETTINGS
+
+
+def pytest_configure(config):
+    """Settings the ``manage.py test`` runner applies, for pytest runs.
+
+    Set once for the session, so ``override_settings`` of tests wins.
+    """
+    from django.conf import settings
+
+    for name, value in TEST_SETTINGS.items():
+        setattr(settings, name, value)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 
-from .models import Comment, Follow, Group, Post
+from .models import (AuthorStats, Comment, Follow, Group, GroupStats, Job,
+                     Post)
 
 
 @admin.register(Post)
@@ -26,3 +27,23 @@ class CommentAdmin(admin.ModelAdmin):
 @admin.register(Follow)
 class FollowAdmin(admin.ModelAdmin):
     list_display = ('author', 'user')
+
+
+@admin.register(AuthorStats)
+class AuthorStatsAdmin(admin.ModelAdmin):
+    list_display = ('user', 'followers_count', 'following_count',
+                    'posts_count')
+    search_fields = ('user__username',)
+
+
+@admin.register(GroupStats)
+class GroupStatsAdmin(admin.ModelAdmin):
+    list_display = ('group', 'posts_count', 'last_post')
+    search_fields = ('group__title',)
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'task', 'status', 'attempts', 'run_at',
+                    'claimed_at')
+    list_filter = ('status',)
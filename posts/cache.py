@@ -0,0 +1,71 @@
+"""Versioned keys for cached feed pages.
+
+Every feed fragment is cached without a timeout under a key that includes
+the version of its scope: ``index``, ``group:<id>``, ``profile:<id>`` or
+``follow:<user id>``. Signals bump a version when the content behind it
+changes, so stale fragments are never read again and simply expire from
+the cache backend.
+"""
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'feed-version:{}'
+
+MODIFIED_KEY = 'content-modified'
+
+
+def scope_keys(scopes):
+    return [VERSION_KEY.format(scope) for scope in scopes]
+
+
+def feed_version(*scopes):
+    """Combined version of the given scopes for a fragment cache key."""
+    keys = scope_keys(scopes)
+    versions = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in versions}
+    if missing:
+        # A lost version restarts from the clock, so it can never match
+        # a fragment cached under an older value.
+        for key, version in missing.items():
+            cache.add(key, version, None)
+        versions.update(cache.get_many(missing))
+    return '-'.join(str(versions.get(key, missing.get(key)))
+                    for key in keys)
+
+
+def invalidate(*scopes):
+    """Bump versions of the given scopes."""
+    for key in scope_keys(scopes):
+        try:
+            cache.incr(key)
+        except ValueError:
+            pass
+
+
+def post_scopes(post, group_ids=()):
+    """Feeds showing the post, including groups it was moved from."""
+    group_ids = {post.group_id, *group_ids} - {None}
+    return ('index', f'profile:{post.author_id}',
+            *(f'group:{group_id}' for group_id in group_ids))
+
+
+def group_scopes(group_id, author_ids):
+    """Feeds showing posts of the group with its title and link."""
+    return ('index', f'group:{group_id}',
+            *(f'profile:{author_id}' for author_id in author_ids))
+
+
+def mark_modified():
+    """Remember when any post, comment or follow changed last."""
+    cache.set(MODIFIED_KEY, time.time(), None)
+
+
+def last_modified():
+    """Timestamp of the latest content change."""
+    modified = cache.get(MODIFIED_KEY)
+    if modified is None:
+        # Unknown history is treated as a change that just happened.
+        modified = time.time()
+        cache.add(MODIFIED_KEY, modified, None)
+    return modified
@@ -0,0 +1,56 @@
+"""Post cards rendered once and shared by every feed.
+
+A card is cached under ``card:<post id>:<digest>``, where the digest
+covers everything the card shows, so an edited post, a new comment or a
+renamed group simply makes a new key and old cards expire on their own.
+Cards are cached without the edit button, which is put in for the
+viewer's own posts on every render. A page of cards costs one
+``get_many`` and renders only the cards missing from the cache.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+CARD_KEY = 'card:{}:{}'
+
+EDIT_PLACEHOLDER = '<!-- edit-button -->'
+
+
+def digest(post):
+    """Hash of every value the card of the post shows."""
+    group = post.group
+    shown = (post.html, post.pub_date.isoformat(), post.author.username,
+             group and (group.slug, group.title), post.image.name,
+             post.thumbnails, getattr(post, 'comments_count', None))
+    return hashlib.md5(repr(shown).encode()).hexdigest()
+
+
+def card_key(post):
+    return CARD_KEY.format(post.pk, digest(post))
+
+
+def render_cards(posts, user):
+    """HTML of the cards of the posts as seen by the user."""
+    posts = list(posts)
+    keys = [card_key(post) for post in posts]
+    cards = cache.get_many(keys)
+    missing = {key: render_to_string('includes/post_card.html',
+                                     {'post': post})
+               for key, post in zip(keys, posts) if key not in cards}
+    if missing:
+        cache.set_many(missing, settings.CARD_CACHE_TIMEOUT)
+        cards.update(missing)
+    return mark_safe(''.join(
+        personalize(cards[key], post, user)
+        for key, post in zip(keys, posts)))
+
+
+def personalize(card, post, user):
+    if user.is_authenticated and user.pk == post.author_id:
+        button = render_to_string('includes/post_edit_button.html',
+                                  {'post': post})
+        return card.replace(EDIT_PLACEHOLDER, button, 1)
+    return card
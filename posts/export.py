@@ -0,0 +1,78 @@
+"""Machine-readable dumps of posts and comments.
+
+Rows are read with ``values()`` in primary key order through
+``iterator()``, so an export of any size holds one chunk in memory.
+Every record carries its ``id``, an export resumes after the last id
+it got.
+"""
+import json
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from posts.models import Comment, Post
+
+POST_FIELDS = ('id', 'text', 'pub_date', 'author__username', 'group__slug',
+               'image', 'comments_count')
+
+COMMENT_FIELDS = ('id', 'post', 'author__username', 'text', 'created')
+
+
+def posts(author=None, group=None, after=0):
+    queryset = Post.objects.feed().filter(pk__gt=after)
+    if author:
+        queryset = queryset.filter(author__username=author)
+    if group:
+        queryset = queryset.filter(group__slug=group)
+    return queryset.order_by('pk').values(*POST_FIELDS)
+
+
+def comments(author=None, post=None, after=0):
+    queryset = Comment.objects.filter(pk__gt=after)
+    if author:
+        queryset = queryset.filter(author__username=author)
+    if post:
+        queryset = queryset.filter(post=post)
+    return queryset.order_by('pk').values(*COMMENT_FIELDS)
+
+
+def post_record(row):
+    return {
+        'id': row['id'],
+        'author': row['author__username'],
+        'group': row['group__slug'],
+        'pub_date': row['pub_date'].isoformat(),
+        'text': row['text'],
+        'image': default_storage.url(row['image']) if row['image'] else None,
+        'comments_count': row['comments_count'],
+    }
+
+
+def comment_record(row):
+    return {
+        'id': row['id'],
+        'post': row['post'],
+        'author': row['author__username'],
+        'created': row['created'].isoformat(),
+        'text': row['text'],
+    }
+
+
+def dumps(record):
+    return json.dumps(record, ensure_ascii=False)
+
+
+def ndjson(queryset, serialize, limit=None):
+    """Lines of JSON records, read from the database chunk by chunk."""
+    if limit is not None:
+        queryset = queryset[:limit]
+    for row in queryset.iterator(chunk_size=settings.EXPORT_CHUNK_SIZE):
+        yield dumps(serialize(row)) + '\n'
+
+
+def json_array(lines):
+    """The same records as one JSON array."""
+    yield '['
+    for number, line in enumerate(lines):
+        yield (',' if number else '') + line.rstrip('\n')
+    yield ']'
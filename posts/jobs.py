@@ -0,0 +1,107 @@
+"""Database-backed queue for side effects of requests.
+
+``enqueue`` stores a call of any module-level function as a ``Job`` row.
+Requests run in autocommit, so the row is committed at once, after the
+change that queued it; inside ``transaction.atomic`` it commits or rolls
+back with the block. ``manage.py run_jobs`` workers claim pending jobs
+one by one and retry failures with exponential backoff. A claim is a
+lease: jobs left running longer than ``JOBS_LEASE_SECONDS`` by a crashed
+worker are queued again. With ``JOBS_EAGER`` the call is made right
+away, which is what tests want.
+"""
+import datetime as dt
+import json
+import logging
+import traceback
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from posts.models import Job
+
+logger = logging.getLogger(__name__)
+
+
+def task_name(func):
+    return f'{func.__module__}.{func.__qualname__}'
+
+
+def enqueue(func, *args, delay=0):
+    """Call ``func(*args)`` in a worker; arguments must be JSON-friendly."""
+    if settings.JOBS_EAGER:
+        return func(*args)
+    return Job.objects.create(
+        task=task_name(func),
+        payload=json.dumps(args),
+        run_at=timezone.now() + dt.timedelta(seconds=delay))
+
+
+def enqueue_once(func, *args, delay=0):
+    """Like ``enqueue``, unless the same call is already waiting to run.
+
+    A burst of changes then shares one run of an expensive job.
+    """
+    if settings.JOBS_EAGER:
+        return func(*args)
+    waiting = Job.objects.filter(
+        status=Job.PENDING, task=task_name(func),
+        payload=json.dumps(args)).first()
+    return waiting or enqueue(func, *args, delay=delay)
+
+
+def reclaim():
+    """Queue again the jobs whose workers let the lease expire."""
+    now = timezone.now()
+    expired = Job.objects.filter(
+        status=Job.RUNNING,
+        claimed_at__lt=now - dt.timedelta(seconds=settings.JOBS_LEASE_SECONDS))
+    expired.filter(attempts__gte=settings.JOBS_MAX_ATTEMPTS).update(
+        status=Job.FAILED, last_error='Lease expired.')
+    return expired.update(status=Job.PENDING, run_at=now)
+
+
+def claim():
+    """Lock the next due job for this worker, or return None."""
+    reclaim()
+    while True:
+        job = Job.objects.filter(
+            status=Job.PENDING, run_at__lte=timezone.now()).first()
+        if job is None:
+            return None
+        claimed = Job.objects.filter(pk=job.pk, status=Job.PENDING).update(
+            status=Job.RUNNING, attempts=F('attempts') + 1,
+            claimed_at=timezone.now())
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run(job):
+    try:
+        import_string(job.task)(*json.loads(job.payload))
+    except Exception:
+        logger.exception('Job %s failed', job)
+        job.last_error = traceback.format_exc()
+        if job.attempts < settings.JOBS_MAX_ATTEMPTS:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + dt.timedelta(
+                seconds=2 ** job.attempts)
+        else:
+            job.status = Job.FAILED
+        job.save(update_fields=('status', 'run_at', 'last_error'))
+    else:
+        job.delete()
+
+
+def work(limit=None):
+    """Run due jobs until the queue is empty; return how many ran."""
+    done = 0
+    while limit is None or done < limit:
+        job = claim()
+        if job is None:
+            break
+        run(job)
+        done += 1
+    return done
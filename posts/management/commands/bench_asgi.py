@@ -0,0 +1,115 @@
+import asyncio
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from wsgiref.util import setup_testing_defaults
+
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+
+from posts.models import Post
+from yatube.asgi import application as asgi_application
+from yatube.perf import percentile
+from yatube.wsgi import application as wsgi_application
+
+
+def wsgi_get(path):
+    environ = {'PATH_INFO': path, 'wsgi.input': io.BytesIO()}
+    setup_testing_defaults(environ)
+    statuses = []
+    body = wsgi_application(
+        environ, lambda status, headers: statuses.append(status))
+    b''.join(body)
+    body.close()
+    return int(statuses[0].split()[0])
+
+
+async def asgi_get(path):
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'host', b'127.0.0.1')],
+        'client': ('127.0.0.1', 0),
+        'server': ('127.0.0.1', 80),
+    }
+    statuses = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            statuses.append(message['status'])
+
+    await asgi_application(scope, receive, send)
+    return statuses[0]
+
+
+class Command(BaseCommand):
+    help = ('Compare throughput of the WSGI application served by a fixed '
+            'number of worker threads with the ASGI application, both '
+            'called in process by many concurrent clients.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--wsgi-workers', type=int, default=4,
+                            help='Threads of the WSGI server.')
+
+    def handle(self, *args, **options):
+        posts = list(Post.objects.values_list('pk', 'author__username')[:20])
+        if not posts:
+            raise CommandError('No posts to request, run "seed" first.')
+        paths = [reverse('index')]
+        for post_id, username in posts:
+            paths += [reverse('post', args=(username, post_id)),
+                      reverse('profile', args=(username,))]
+        paths = [paths[n % len(paths)] for n in range(options['requests'])]
+        self.report('wsgi', self.run_wsgi(paths, options))
+        self.report('asgi', asyncio.run(self.run_asgi(paths, options)))
+
+    def run_wsgi(self, paths, options):
+        """Clients queue up for the worker threads like on a WSGI server."""
+        def timed(path, queued):
+            status = wsgi_get(path)
+            return status, time.perf_counter() - queued
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['wsgi_workers']) as pool:
+            results = []
+            for offset in range(0, len(paths), options['concurrency']):
+                batch = paths[offset:offset + options['concurrency']]
+                futures = [pool.submit(timed, path, time.perf_counter())
+                           for path in batch]
+                results += [future.result() for future in futures]
+        return results, time.perf_counter() - started
+
+    async def run_asgi(self, paths, options):
+        limit = asyncio.Semaphore(options['concurrency'])
+
+        async def timed(path):
+            async with limit:
+                queued = time.perf_counter()
+                status = await asgi_get(path)
+                return status, time.perf_counter() - queued
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(timed(path) for path in paths))
+        return results, time.perf_counter() - started
+
+    def report(self, name, run):
+        results, elapsed = run
+        latencies = sorted(latency * 1000 for _, latency in results)
+        errors = sum(status >= 500 for status, _ in results)
+        self.stdout.write(
+            f'{name}: {len(results) / elapsed:8.1f} requests/s, '
+            f'p50 {percentile(latencies, 0.50):7.1f}ms, '
+            f'p99 {percentile(latencies, 0.99):7.1f}ms, '
+            f'{errors} errors')
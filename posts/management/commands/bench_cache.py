@@ -0,0 +1,71 @@
+import multiprocessing
+import random
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+PAGES = 2000
+
+
+def open_cache(config):
+    backend = import_string(config['BACKEND'])
+    params = {key: value for key, value in config.items()
+              if key not in ('BACKEND', 'LOCATION')}
+    return backend(config.get('LOCATION', ''), params)
+
+
+def serve(config, requests, seed):
+    """One worker process serving pages with Zipf-like popularity."""
+    cache = open_cache(config)
+    pages = random.Random(seed)
+    hits = 0
+    for _ in range(requests):
+        key = f'bench-page:{int(pages.paretovariate(0.8)) % PAGES}'
+        if cache.get(key) is None:
+            cache.set(key, 'x' * 2048, None)
+        else:
+            hits += 1
+    return hits
+
+
+class Command(BaseCommand):
+    help = ('Compare cache hit rates of several worker processes sharing '
+            'a process-local and a shared cache backend.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=4)
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument(
+            '--backend', action='append', dest='backends',
+            choices=sorted(settings.CACHE_BACKENDS),
+            help='Backends to compare, locmem and file by default.')
+
+    def handle(self, *args, **options):
+        workers, requests = options['workers'], options['requests']
+        for name in options['backends'] or ['locmem', 'file']:
+            config = dict(settings.CACHE_BACKENDS[name])
+            # Culling would blur the comparison, every page must fit.
+            config['OPTIONS'] = {**config.get('OPTIONS', {}),
+                                 'MAX_ENTRIES': PAGES * 2}
+            with tempfile.TemporaryDirectory() as location:
+                if name == 'file':
+                    config['LOCATION'] = location
+                if name == 'db':
+                    call_command('createcachetable', config['LOCATION'])
+                open_cache(config).clear()
+                started = time.perf_counter()
+                with multiprocessing.Pool(workers) as pool:
+                    hits = sum(pool.starmap(
+                        serve,
+                        [(config, requests, seed) for seed in range(workers)]
+                    ))
+                elapsed = time.perf_counter() - started
+            total = workers * requests
+            self.stdout.write(
+                f'{name:>10}: hit rate {hits / total:6.1%} '
+                f'over {total} requests from {workers} workers '
+                f'in {elapsed:.2f}s')
@@ -0,0 +1,56 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.template.loader import render_to_string
+
+from posts.cards import card_key, render_cards
+from posts.management.commands.seed import batched
+from posts.models import Post
+from yatube.perf import percentile
+
+
+def render_each(page):
+    """Cards rendered from the template one by one, without the cache."""
+    return ''.join(render_to_string('includes/post_card.html',
+                                    {'post': post}) for post in page)
+
+
+class Command(BaseCommand):
+    help = ('Time rendering of feed pages: every card rendered from the '
+            'template, and pages assembled from the card cache while it '
+            'is cold and once it is warm.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=100)
+        parser.add_argument('--per-page', type=int,
+                            default=settings.PAGINATION_PER_PAGE)
+
+    def handle(self, *args, **options):
+        per_page = options['per_page']
+        posts = list(Post.objects.feed()[:options['pages'] * per_page])
+        if not posts:
+            raise CommandError('No posts to render, run "seed" first.')
+        pages = list(batched(posts, per_page))
+        viewer = AnonymousUser()
+
+        self.report('no cache', pages, render_each)
+        cache.delete_many([card_key(post) for post in posts])
+        self.report('cold cache', pages,
+                    lambda page: render_cards(page, viewer))
+        self.report('warm cache', pages,
+                    lambda page: render_cards(page, viewer))
+
+    def report(self, name, pages, render):
+        timings = []
+        for page in pages:
+            started = time.perf_counter()
+            render(page)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'{name:>10}: {sum(timings) / len(timings):7.2f}ms per page, '
+            f'p50 {percentile(timings, 0.50):7.2f}ms, '
+            f'p99 {percentile(timings, 0.99):7.2f}ms')
@@ -0,0 +1,71 @@
+import random
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from posts import search
+from posts.models import Post
+
+User = get_user_model()
+
+SYLLABLES = ('ка', 'ро', 'ми', 'ту', 'ле', 'на', 'со', 'пре', 'вол', 'дар',
+             'мир', 'ст', 'гор', 'ин', 'ол', 'ве')
+ENDINGS = ('', 'а', 'ы', 'ой', 'ами', 'ах', 'ого', 'ый', 'ая', 'ить', 'ет')
+
+
+class Command(BaseCommand):
+    help = ('Compare indexed search with a LIKE scan on generated posts. '
+            'Everything is rolled back afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--queries', type=int, default=20)
+        parser.add_argument('--words', type=int, default=50_000,
+                            help='Vocabulary size of the generated texts.')
+
+    def handle(self, *args, **options):
+        rand = random.Random(0)
+        stems = sorted({
+            ''.join(rand.choice(SYLLABLES) for _ in range(rand.randint(2, 4)))
+            for _ in range(options['words'])})
+        with transaction.atomic():
+            author = User.objects.create(username='bench-search')
+            started = time.perf_counter()
+            for start in range(0, options['posts'], 10_000):
+                size = min(10_000, options['posts'] - start)
+                Post.objects.bulk_create(
+                    Post(author=author, text=' '.join(
+                        rand.choice(stems) + rand.choice(ENDINGS)
+                        for _ in range(rand.randint(5, 40))))
+                    for _ in range(size))
+            self.stdout.write(f'Created {options["posts"]} posts in '
+                              f'{time.perf_counter() - started:.1f}s')
+
+            started = time.perf_counter()
+            search.rebuild()
+            self.stdout.write(
+                f'Indexed in {time.perf_counter() - started:.1f}s')
+
+            queries = [rand.choice(stems) for _ in range(options['queries'])]
+            # Both are capped alike, so they return as many posts.
+            limit = settings.SEARCH_MAX_RESULTS
+            self.report('icontains', queries, lambda word: list(
+                Post.objects.filter(text__icontains=word).values_list(
+                    'pk', flat=True)[:limit]))
+            self.report('search', queries, search.search)
+            transaction.set_rollback(True)
+
+    def report(self, name, queries, run):
+        timings, found = [], 0
+        for word in queries:
+            started = time.perf_counter()
+            found += len(run(word))
+            timings.append(time.perf_counter() - started)
+        timings.sort()
+        self.stdout.write(
+            f'{name:>10}: median {timings[len(timings) // 2] * 1000:8.1f}ms, '
+            f'max {timings[-1] * 1000:8.1f}ms, '
+            f'{found / len(queries):.0f} posts per query')
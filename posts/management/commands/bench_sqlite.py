@@ -0,0 +1,117 @@
+import multiprocessing
+import os
+import sqlite3
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from posts.models import Comment, Post
+
+
+def open_db(path, pragmas):
+    db = sqlite3.connect(path, timeout=5, isolation_level=None)
+    for name, value in pragmas.items():
+        db.execute(f'PRAGMA {name} = {value}')
+    return db
+
+
+def read(path, pragmas, persistent, sql, params, duration):
+    """Run the feed query over and over, return (requests, errors)."""
+    done = errors = 0
+    db = open_db(path, pragmas)
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        if not persistent:
+            db.close()
+            db = open_db(path, pragmas)
+        try:
+            db.execute(sql, params).fetchall()
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+    return done, errors
+
+
+def write(path, pragmas, persistent, sql, rows, duration):
+    """Insert comments one transaction each, return (requests, errors)."""
+    done = errors = 0
+    db = open_db(path, pragmas)
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        if not persistent:
+            db.close()
+            db = open_db(path, pragmas)
+        try:
+            db.execute('BEGIN IMMEDIATE')
+            db.execute(sql, rows[done % len(rows)])
+            db.execute('COMMIT')
+            done += 1
+        except sqlite3.OperationalError:
+            errors += 1
+            if db.in_transaction:
+                db.execute('ROLLBACK')
+    return done, errors
+
+
+class Command(BaseCommand):
+    help = ('Measure read and write throughput of concurrent processes on '
+            'a copy of the database, with default SQLite settings and with '
+            'the production profile (WAL, pragmas, persistent connections).')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--duration', type=float, default=5,
+                            help='Seconds each profile runs.')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('The benchmark only runs on SQLite.')
+        posts = list(Post.objects.values_list('pk', 'author_id')[:100])
+        if not posts:
+            raise CommandError('No posts to read, run "seed" first.')
+        sql, params = Post.objects.feed()[
+            :settings.PAGINATION_PER_PAGE].query.sql_with_params()
+        feed = (sql.replace('%s', '?'), params)
+        columns = ('post_id', 'author_id', 'created', 'text')
+        insert = (f'INSERT INTO {Comment._meta.db_table} '
+                  f'({", ".join(columns)}) VALUES (?, ?, ?, ?)')
+        rows = [(post_id, author_id, timezone.now().isoformat(' '),
+                 'benchmark') for post_id, author_id in posts]
+
+        profiles = (
+            ('default', {}, False),
+            ('production', settings.SQLITE_PRODUCTION_PRAGMAS, True),
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            for name, pragmas, persistent in profiles:
+                path = os.path.join(directory, f'{name}.sqlite3')
+                with sqlite3.connect(path) as copy:
+                    connection.ensure_connection()
+                    connection.connection.backup(copy)
+                # journal_mode=WAL is stored in the file, reset it.
+                open_db(path, {'journal_mode': 'DELETE'}).close()
+                self.run(name, path, pragmas, persistent, feed,
+                         (insert, rows), options)
+
+    def run(self, name, path, pragmas, persistent, feed, insert, options):
+        duration = options['duration']
+        jobs = ([(read, (path, pragmas, persistent, *feed, duration))]
+                * options['readers']
+                + [(write, (path, pragmas, persistent, *insert, duration))]
+                * options['writers'])
+        with multiprocessing.Pool(len(jobs)) as pool:
+            results = [pool.apply_async(func, args) for func, args in jobs]
+            results = [result.get() for result in results]
+        reads = results[:options['readers']]
+        writes = results[options['readers']:]
+        self.stdout.write(
+            f'{name:>10}: '
+            f'{sum(done for done, _ in reads) / duration:9.0f} reads/s, '
+            f'{sum(done for done, _ in writes) / duration:7.0f} writes/s, '
+            f'{sum(errors for _, errors in reads + writes)} '
+            f'busy errors')
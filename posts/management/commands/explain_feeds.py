@@ -0,0 +1,73 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts.models import Comment, Follow, Post, User
+from posts.pagination import CursorPaginator
+from posts.timeline import TimelinePaginator
+
+
+class Command(BaseCommand):
+    help = ('Print the query plan of every feed query and flag full '
+            'table scans and temporary B-tree sorts.')
+
+    def deep_page(self, post_list, ordering=('-pub_date', '-id'),
+                  values=None):
+        """Query of a page reached by a cursor, as CursorPaginator runs it."""
+        paginator = CursorPaginator(post_list, settings.PAGINATION_PER_PAGE,
+                                    ordering=ordering)
+        condition = paginator.beyond(values or [timezone.now(), 1],
+                                     backwards=False)
+        return paginator.object_list.filter(condition)[:paginator.per_page]
+
+    def timeline_pages(self, user):
+        """Slices a subscription feed page merges, one celebrity followed."""
+        paginator = TimelinePaginator(user, settings.PAGINATION_PER_PAGE,
+                                      celebrities=[2])
+        timeline, celebrity = paginator.slices(
+            (False, [timezone.now(), 1]), paginator.per_page + 1)
+        return {'follow_index: timeline': timeline,
+                'follow_index: celebrity': celebrity,
+                'follow_index: posts': paginator.object_list.filter(
+                    pk__in=[1, 2]).order_by()}
+
+    def queries(self):
+        user = User(pk=1)
+        return {
+            'index': self.deep_page(Post.objects.feed()),
+            'group_posts': self.deep_page(
+                Post.objects.feed().filter(group_id=1)),
+            'profile': self.deep_page(user.posts.feed()),
+            **self.timeline_pages(user),
+            'trending': self.deep_page(Post.objects.feed(),
+                                       ordering=('-score', '-id'),
+                                       values=[1000.0, 1]),
+            'post_view: comments': self.deep_page(
+                Comment.objects.filter(post_id=1),
+                ordering=('-created', '-id')),
+            'profile: following': Follow.objects.filter(
+                user=user, author_id=2),
+            'profile_follow: followers': Follow.objects.filter(
+                author=user).values('user_id'),
+        }
+
+    def handle(self, *args, **options):
+        problems = 0
+        for view, queryset in self.queries().items():
+            plan = queryset.explain()
+            self.stdout.write(self.style.MIGRATE_HEADING(view))
+            self.stdout.write(plan)
+            issues = [line.strip() for line in plan.splitlines()
+                      if self.is_full_scan(line) or 'TEMP B-TREE' in line]
+            for issue in issues:
+                self.stdout.write(self.style.ERROR(f'  problem: {issue}'))
+            problems += len(issues)
+        if problems:
+            self.stdout.write(self.style.ERROR(f'{problems} problem(s).'))
+        else:
+            self.stdout.write(self.style.SUCCESS('All feeds use indexes.'))
+
+    @staticmethod
+    def is_full_scan(line):
+        """SCAN without USING INDEX reads the whole table."""
+        return ' SCAN ' in f' {line} ' and 'USING' not in line
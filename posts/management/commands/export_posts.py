@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from posts import export
+
+
+class Command(BaseCommand):
+    help = ('Write posts, or comments with --comments, as NDJSON. The '
+            'records are the same as the ones of the export API.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--comments', action='store_true')
+        parser.add_argument('--author', help='Username of the author.')
+        parser.add_argument('--group', help='Slug of the group of posts.')
+        parser.add_argument('--after', type=int, default=0,
+                            help='Resume after this id.')
+        parser.add_argument('--output', help='File to write, or stdout.')
+
+    def handle(self, *args, **options):
+        if options['comments']:
+            lines = export.ndjson(
+                export.comments(author=options['author'],
+                                after=options['after']),
+                export.comment_record)
+        else:
+            lines = export.ndjson(
+                export.posts(author=options['author'],
+                             group=options['group'],
+                             after=options['after']),
+                export.post_record)
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line)
+            return
+        count = 0
+        with open(options['output'], 'w', encoding='utf-8') as output:
+            for count, line in enumerate(lines, 1):
+                output.write(line)
+        self.stderr.write(f'Exported {count} records.')
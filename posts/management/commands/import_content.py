@@ -0,0 +1,386 @@
+import csv
+import json
+import os
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts import following, markup, search, timeline, trending
+from posts.cache import invalidate, mark_modified, post_scopes
+from posts.management.commands.seed import batched, explicit_dates
+from posts.models import (AuthorStats, Comment, Follow, Group, GroupStats,
+                          Post)
+
+User = get_user_model()
+
+KINDS = ('groups', 'posts', 'comments', 'follows')
+
+# Fields telling whether a row holding a record's id is that record.
+IDENTITY = {
+    'posts': ('author_id', 'pub_date'),
+    'comments': ('post_id', 'author_id', 'created'),
+}
+
+
+def read_ndjson(path):
+    with open(path, encoding='utf-8') as lines:
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_csv(path):
+    with open(path, encoding='utf-8', newline='') as lines:
+        for row in csv.DictReader(lines):
+            yield {key: value or None for key, value in row.items()}
+
+
+def parse_date(value):
+    """Aware datetime of an ISO string, or now when it is missing."""
+    if not value:
+        return timezone.now()
+    date = parse_datetime(value)
+    if date is None:
+        raise ValueError(f'Invalid date: {value!r}')
+    if timezone.is_naive(date):
+        date = timezone.make_aware(date)
+    return date
+
+
+def image_name(value):
+    """Storage name of an image given by name or by its exported URL."""
+    if value and value.startswith(settings.MEDIA_URL):
+        return value[len(settings.MEDIA_URL):]
+    return value or ''
+
+
+class Checkpoint:
+    """Number of input records already committed, kept next to the input.
+
+    It is saved after every committed batch. A batch that committed just
+    before a crash is read again on resume, which is harmless: posts and
+    comments must carry their ids, groups and follows are unique by slug
+    and by pair, so rows of such a batch are found already present.
+    """
+
+    def __init__(self, path, kind):
+        self.path = path
+        self.kind = kind
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return 0
+        with open(self.path, encoding='utf-8') as file:
+            state = json.load(file)
+        if state['kind'] != self.kind:
+            raise CommandError(
+                f'Checkpoint {self.path} belongs to an import of '
+                f'{state["kind"]}, use --restart to discard it.')
+        return state['done']
+
+    def save(self, done):
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump({'kind': self.kind, 'done': done}, file)
+        os.replace(temporary, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class Command(BaseCommand):
+    help = ('Import groups, posts, comments or follows from an NDJSON or '
+            'CSV file in batches. Records look like the ones of the export '
+            'API: authors are given by username, groups by slug, posts by '
+            'id, and posts and comments keep their ids. Progress is '
+            'checkpointed, so a failed import resumes where it stopped. '
+            'Derived tables of every batch are updated in its transaction. '
+            'Records whose id '
+            'belongs to a different row are reported and fail the import.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=KINDS)
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=('ndjson', 'csv'),
+                            help='Input format, by file extension if unset.')
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--checkpoint',
+                            help='Checkpoint file, PATH.checkpoint if unset.')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore the checkpoint and start over.')
+        parser.add_argument('--create-users', action='store_true',
+                            help='Create unknown users without a password.')
+        parser.add_argument('--no-rebuild', action='store_true',
+                            help='Leave derived tables to the rebuild '
+                                 'commands.')
+
+    def handle(self, *args, **options):
+        kind, path = options['kind'], options['path']
+        if not os.path.exists(path):
+            raise CommandError(f'No such file: {path}')
+        fmt = options['format'] or (
+            'csv' if path.lower().endswith('.csv') else 'ndjson')
+        records = read_csv(path) if fmt == 'csv' else read_ndjson(path)
+        checkpoint = Checkpoint(options['checkpoint'] or f'{path}.checkpoint',
+                                kind)
+        if options['restart']:
+            checkpoint.clear()
+        done = checkpoint.load()
+        if done:
+            self.stdout.write(f'Resuming after {done} records.')
+        for _ in zip(range(done), records):
+            pass
+
+        self.create_users = options['create_users']
+        self.update = not options['no_rebuild']
+        self.updating = 0.0
+        self.skipped = Counter()
+        self.conflicts = []
+        self.load_lookups(kind)
+        model = {'groups': Group, 'posts': Post,
+                 'comments': Comment, 'follows': Follow}[kind]
+
+        before = model.objects.count()
+        started = time.perf_counter()
+        written = self.write_batches(kind, model, records, checkpoint, done,
+                                     options)
+        elapsed = time.perf_counter() - started
+        checkpoint.clear()
+        imported = model.objects.count() - before
+        if written > imported:
+            self.skipped['already present'] += written - imported
+
+        if kind in ('posts', 'comments'):
+            self.reset_sequence(model)
+        self.stdout.write(f'Imported {imported} {kind} in {elapsed:.1f}s '
+                          f'({imported / max(elapsed, 1e-9):.0f}/s)')
+        if self.update:
+            self.stdout.write(
+                f'Updated derived tables in {self.updating:.1f}s')
+        for reason, count in self.skipped.most_common():
+            self.stdout.write(f'Skipped {count}: {reason}')
+        mark_modified()
+        if self.conflicts:
+            shown = ', '.join(map(str, self.conflicts[:20]))
+            raise CommandError(
+                f'{len(self.conflicts)} records conflict with different '
+                f'existing rows of the same id: {shown}'
+                f'{", ..." if len(self.conflicts) > 20 else ""}')
+        self.stdout.write(self.style.SUCCESS('Done.'))
+
+    def write_batches(self, kind, model, records, checkpoint, done,
+                      options):
+        """Insert records batch by batch, return the number of rows sent."""
+        build = getattr(self, f'build_{kind[:-1]}')
+        date_field = {'posts': 'pub_date', 'comments': 'created'}.get(kind)
+        written = 0
+        for batch in batched(records, options['batch_size']):
+            with transaction.atomic():
+                self.resolve_users(kind, batch)
+                objects = [obj for obj in (
+                    self.build(build, record) for record in batch)
+                    if obj is not None]
+                if kind in IDENTITY:
+                    objects = self.new_objects(model, objects,
+                                               IDENTITY[kind])
+                if date_field:
+                    with explicit_dates(model, date_field):
+                        model.objects.bulk_create(objects,
+                                                  ignore_conflicts=True)
+                else:
+                    model.objects.bulk_create(objects, ignore_conflicts=True)
+                self.after_insert(kind, objects)
+            done += len(batch)
+            written += len(objects)
+            checkpoint.save(done)
+            if options['verbosity'] > 1:
+                self.stdout.write(f'{done} records read')
+        return written
+
+    def new_objects(self, model, objects, fields):
+        """Objects whose ids are free; others are present or conflict."""
+        existing = {row[0]: row[1:] for row in model.objects.filter(
+            pk__in=[obj.pk for obj in objects]).values_list('pk', *fields)}
+        new = []
+        for obj in objects:
+            if obj.pk not in existing:
+                new.append(obj)
+            elif existing[obj.pk] == tuple(getattr(obj, field)
+                                           for field in fields):
+                self.skipped['already present'] += 1
+            else:
+                self.conflicts.append(obj.pk)
+        return new
+
+    def build(self, build, record):
+        """Object of a record, or None when it is skipped."""
+        try:
+            return build(record)
+        except (KeyError, TypeError, ValueError) as error:
+            self.skipped[f'invalid record ({error})'] += 1
+            return None
+
+    def load_lookups(self, kind):
+        """Keep ids of every row records may refer to in memory."""
+        self.users = {}
+        if kind in ('posts', 'comments', 'follows'):
+            self.users = dict(User.objects.values_list('username', 'pk'))
+        self.groups = {}
+        if kind == 'posts':
+            self.groups = dict(Group.objects.values_list('slug', 'pk'))
+        self.posts = set()
+        if kind == 'comments':
+            self.posts = set(Post.objects.values_list('pk', flat=True))
+
+    def resolve_users(self, kind, batch):
+        """Create the unknown users of a batch with ``--create-users``."""
+        if not self.create_users:
+            return
+        fields = ('user', 'author') if kind == 'follows' else ('author',)
+        missing = {record.get(field) for record in batch
+                   for field in fields} - set(self.users) - {None}
+        if not missing:
+            return
+        User.objects.bulk_create(
+            (User(username=username, password='!')
+             for username in missing), ignore_conflicts=True)
+        created = dict(User.objects.filter(
+            username__in=missing).values_list('username', 'pk'))
+        self.users.update(created)
+        # bulk_create sends no post_save, which creates the stats row.
+        AuthorStats.objects.bulk_create(
+            (AuthorStats(user_id=user_id) for user_id in created.values()),
+            ignore_conflicts=True)
+
+    def record_id(self, record):
+        """Id a post or comment keeps, or None to skip the record."""
+        if not record.get('id'):
+            self.skipped['missing id'] += 1
+            return None
+        return int(record['id'])
+
+    def lookup(self, mapping, key, name):
+        """Id of a referenced row, or None to skip the record."""
+        if key in mapping:
+            return mapping[key]
+        self.skipped[f'unknown {name}'] += 1
+        return None
+
+    def build_group(self, record):
+        return Group(title=record['title'],
+                     slug=record['slug'],
+                     description=record.get('description') or '')
+
+    def build_post(self, record):
+        post_id = self.record_id(record)
+        if post_id is None:
+            return None
+        author_id = self.lookup(self.users, record['author'], 'author')
+        if author_id is None:
+            return None
+        group_id = None
+        if record.get('group'):
+            group_id = self.lookup(self.groups, record['group'], 'group')
+            if group_id is None:
+                return None
+        return Post(id=post_id,
+                    author_id=author_id,
+                    group_id=group_id,
+                    text=record['text'],
+                    text_html=markup.render(record['text']),
+                    pub_date=parse_date(record.get('pub_date')),
+                    image=image_name(record.get('image')))
+
+    def build_comment(self, record):
+        comment_id = self.record_id(record)
+        if comment_id is None:
+            return None
+        post_id = int(record['post'])
+        if post_id not in self.posts:
+            self.skipped['unknown post'] += 1
+            return None
+        author_id = self.lookup(self.users, record['author'], 'author')
+        if author_id is None:
+            return None
+        return Comment(id=comment_id,
+                       post_id=post_id,
+                       author_id=author_id,
+                       text=record['text'],
+                       text_html=markup.render(record['text']),
+                       created=parse_date(record.get('created')))
+
+    def build_follow(self, record):
+        user_id = self.lookup(self.users, record['user'], 'user')
+        author_id = self.lookup(self.users, record['author'], 'author')
+        if user_id is None or author_id is None:
+            return None
+        if user_id == author_id:
+            self.skipped['follow of oneself'] += 1
+            return None
+        return Follow(user_id=user_id, author_id=author_id)
+
+    def reset_sequence(self, model):
+        """Move id sequences past explicitly inserted ids."""
+        statements = connection.ops.sequence_reset_sql(no_style(), [model])
+        if statements:
+            with connection.cursor() as cursor:
+                for sql in statements:
+                    cursor.execute(sql)
+
+    def after_insert(self, kind, objects):
+        """Do what signals do for rows saved one by one."""
+        if not objects:
+            return
+        started = time.perf_counter()
+        if self.update:
+            getattr(self, f'update_{kind}')(objects)
+        self.invalidate(kind, objects)
+        self.updating += time.perf_counter() - started
+
+    def update_groups(self, groups):
+        GroupStats.objects.rebuild(Group.objects.filter(
+            slug__in=[group.slug for group in groups]).values('id'))
+
+    def update_posts(self, posts):
+        post_ids = [post.pk for post in posts]
+        AuthorStats.objects.rebuild({post.author_id for post in posts})
+        GroupStats.objects.rebuild({post.group_id for post in posts})
+        timeline.deliver_many(posts)
+        search.rebuild(post_ids)
+        trending.rebuild(post_ids)
+
+    def update_comments(self, comments):
+        post_ids = {comment.post_id for comment in comments}
+        search.rebuild(post_ids)
+        trending.rebuild(post_ids)
+
+    def update_follows(self, follows):
+        user_ids = {follow.user_id for follow in follows}
+        AuthorStats.objects.rebuild(
+            user_ids | {follow.author_id for follow in follows})
+        timeline.rebuild(sorted(user_ids))
+
+    def invalidate(self, kind, objects):
+        """Drop cached feeds and follows showing the new rows."""
+        if kind == 'posts':
+            posts = objects
+        elif kind == 'comments':
+            posts = Post.objects.filter(pk__in={
+                comment.post_id for comment in objects}).only(
+                'author_id', 'group_id')
+        else:
+            posts = ()
+        invalidate(*{scope for post in posts for scope in post_scopes(post)})
+        if kind == 'follows':
+            user_ids = {follow.user_id for follow in objects}
+            invalidate(*(f'follow:{user_id}' for user_id in user_ids))
+            for user_id in user_ids:
+                following.forget(user_id)
@@ -0,0 +1,129 @@
+import random
+import time
+from collections import defaultdict
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+
+from posts.management.commands.seed import WORDS, zipf
+from posts.models import Group, Post
+from yatube.perf import percentile
+
+User = get_user_model()
+
+# Share of requests per page, roughly what visitors of a blog look at.
+MIX = {
+    'index': 30,
+    'post': 25,
+    'profile': 20,
+    'group_posts': 10,
+    'follow_index': 10,
+    'search': 5,
+}
+
+# Signed in visitors, the rest browse anonymously.
+AUTHENTICATED_SHARE = 0.3
+
+# Settings that change what is measured, printed with the report.
+REPORTED_SETTINGS = ('DEBUG', 'CACHE_BACKEND', 'SQLITE_PRODUCTION',
+                     'DATABASE_REPLICAS', 'QUERYLOG', 'PERF_RECORD',
+                     'PERF_SAMPLE_RATE', 'JOBS_EAGER', 'SEARCH_BACKEND')
+
+
+class Command(BaseCommand):
+    help = ('Replay a realistic mix of page requests with the test client '
+            'and report latency percentiles and query counts per view, '
+            'with the settings they were measured under. Refuses to run '
+            'with the debug toolbar on.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--users', type=int, default=20,
+                            help='Signed in visitors to simulate.')
+        parser.add_argument('--sample', type=int, default=1000,
+                            help='Posts, authors and groups to pick from.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        if settings.DEBUG_TOOLBAR:
+            raise CommandError(
+                'The debug toolbar inflates timings and query counts, '
+                'run with YATUBE_DEBUG_TOOLBAR=0.')
+        self.rand = random.Random(options['seed'])
+        sample = options['sample']
+        self.posts = list(Post.objects.order_by('-pub_date').values_list(
+            'pk', 'author__username')[:sample])
+        self.slugs = list(Group.objects.values_list('slug', flat=True)[
+            :sample])
+        if not self.posts:
+            self.stderr.write('No posts to request, run "seed" first.')
+            return
+        self.popularity = zipf(len(self.posts), 1.0)
+        visitors = []
+        for user in User.objects.filter(
+                username__in={username for _, username in self.posts})[
+                    :options['users']]:
+            client = Client()
+            client.force_login(user)
+            visitors.append(client)
+        anonymous = Client()
+
+        timings = defaultdict(list)
+        queries = defaultdict(list)
+        views = list(MIX)
+        weights = list(MIX.values())
+        for _ in range(options['requests']):
+            view = self.rand.choices(views, weights)[0]
+            url = self.url(view)
+            if url is None:
+                continue
+            client = anonymous
+            signed_in = (view == 'follow_index'
+                         or self.rand.random() < AUTHENTICATED_SHARE)
+            if visitors and signed_in:
+                client = self.rand.choice(visitors)
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                client.get(url)
+                elapsed = time.perf_counter() - started
+            name = resolve(url.split('?')[0]).url_name
+            timings[name].append(elapsed * 1000)
+            queries[name].append(len(context))
+
+        for name in REPORTED_SETTINGS:
+            self.stdout.write(f'{name} = {getattr(settings, name)!r}')
+        self.stdout.write(f'{"view":<14}{"requests":>9}{"p50 ms":>9}'
+                          f'{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}'
+                          f'{"max":>5}')
+        for name in sorted(timings):
+            values = sorted(timings[name])
+            counts = queries[name]
+            self.stdout.write(
+                f'{name:<14}{len(values):>9}'
+                f'{percentile(values, 0.50):>9.1f}'
+                f'{percentile(values, 0.95):>9.1f}'
+                f'{percentile(values, 0.99):>9.1f}'
+                f'{sum(counts) / len(counts):>9.1f}{max(counts):>5}')
+
+    def url(self, view):
+        """URL of the given view with popular arguments."""
+        post_id, username = self.rand.choices(
+            self.posts, cum_weights=self.popularity)[0]
+        if view == 'post':
+            return reverse(view, args=(username, post_id))
+        if view == 'profile':
+            return reverse(view, args=(username,))
+        if view == 'group_posts':
+            if not self.slugs:
+                return None
+            return reverse(view, args=(self.rand.choice(self.slugs),))
+        if view == 'search':
+            query = urlencode({'q': self.rand.choice(WORDS)})
+            return f'{reverse(view)}?{query}'
+        return reverse(view)
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+
+from yatube import perf
+
+
+class Command(BaseCommand):
+    help = 'Summarize request timings recorded in the perf ring buffer.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--slowest', type=int, default=10,
+                            help='Also list this many slowest requests.')
+
+    def handle(self, *args, **options):
+        records = perf.recent()
+        if not records:
+            self.stdout.write('No requests recorded yet.')
+            return
+        self.stdout.write(f'{"view":<24}{"requests":>9}{"p50 ms":>9}'
+                          f'{"p95 ms":>9}{"p99 ms":>9}{"queries":>9}'
+                          f'{"db ms":>8}{"tpl ms":>8}{"cache":>7}')
+        for view, stats in perf.summary(records).items():
+            hit_rate = stats['cache_hit_rate']
+            self.stdout.write(
+                f'{view:<24}{stats["requests"]:>9}'
+                f'{stats["p50_ms"]:>9.1f}{stats["p95_ms"]:>9.1f}'
+                f'{stats["p99_ms"]:>9.1f}{stats["db_queries"]:>9.1f}'
+                f'{stats["db_ms"]:>8.1f}{stats["template_ms"]:>8.1f}'
+                f'{"-" if hit_rate is None else f"{hit_rate:.0%}":>7}')
+        slowest = sorted(records, key=lambda record: -record['total_ms'])
+        if options['slowest'] > 0:
+            self.stdout.write('\nSlowest requests:')
+        for record in slowest[:options['slowest']]:
+            self.stdout.write(
+                f'{record["total_ms"]:9.1f}ms {record["method"]} '
+                f'{record["path"]} ({record["db_queries"]} queries, '
+                f'status {record["status"]})')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import AuthorStats
+
+
+class Command(BaseCommand):
+    help = 'Recount followers, following and posts counters of every user.'
+
+    def handle(self, *args, **options):
+        AuthorStats.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt stats for {AuthorStats.objects.count()} users.'))
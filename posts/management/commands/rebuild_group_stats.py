@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import GroupStats
+
+
+class Command(BaseCommand):
+    help = 'Recount posts, last post and top authors of every group.'
+
+    def handle(self, *args, **options):
+        GroupStats.objects.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt stats for {GroupStats.objects.count()} groups.'))
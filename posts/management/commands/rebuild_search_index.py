@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import search
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Index every post and its comments for search from scratch.'
+
+    def handle(self, *args, **options):
+        search.rebuild()
+        backend = 'FTS5' if search.use_fts() else 'inverted index'
+        self.stdout.write(self.style.SUCCESS(
+            f'Indexed {Post.objects.count()} posts into {backend}.'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = ('Recount trending scores of all posts from publication and '
+            'comment dates, after imports that bypass signals.')
+
+    def handle(self, *args, **options):
+        trending.rebuild()
+        self.stdout.write(self.style.SUCCESS(
+            f'Scored {Post.objects.count()} posts.'))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from posts.models import Post
+from posts.thumbnails import render_thumbnails
+
+
+class Command(BaseCommand):
+    help = 'Render missing thumbnails of post images.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Render thumbnails of every post again.')
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').exclude(image=None)
+        if not options['all']:
+            posts = posts.filter(thumbnails='')
+        count = 0
+        for post_id in posts.values_list('id', flat=True).iterator():
+            render_thumbnails(post_id)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered thumbnails of {count} posts.'))
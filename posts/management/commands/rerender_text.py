@@ -0,0 +1,23 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from posts import markup
+from posts.models import Comment, Post
+
+
+class Command(BaseCommand):
+    help = ('Render the HTML of every post and comment text again, after '
+            'a change of the rendering rules.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        for model in (Post, Comment):
+            changed = markup.rerender(model.objects.all(),
+                                      options['batch_size'])
+            self.stdout.write(f'Updated {changed} of '
+                              f'{model.objects.count()} '
+                              f'{model._meta.model_name} rows.')
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,46 @@
+import multiprocessing
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from posts.jobs import work
+
+
+def serve():
+    """Worker process loop: run due jobs, sleep while the queue is idle."""
+    connections.close_all()
+    try:
+        while True:
+            if not work():
+                time.sleep(settings.JOBS_POLL_INTERVAL)
+    except KeyboardInterrupt:
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Run background job workers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--once', action='store_true',
+                            help='Run due jobs in this process and exit.')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            self.stdout.write(f'Ran {work()} jobs.')
+            return
+        # Children must open their own connections, not share the parent's.
+        connections.close_all()
+        workers = [multiprocessing.Process(target=serve, daemon=True)
+                   for _ in range(options['workers'])]
+        for worker in workers:
+            worker.start()
+        self.stdout.write(f'Started {len(workers)} workers.')
+        try:
+            for worker in workers:
+                worker.join()
+        except KeyboardInterrupt:
+            for worker in workers:
+                worker.terminate()
@@ -0,0 +1,166 @@
+import contextlib
+import datetime as dt
+import itertools
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from posts import markup, search, timeline, trending
+from posts.models import (AuthorStats, Comment, Follow, Group, GroupStats,
+                          Post)
+
+User = get_user_model()
+
+WORDS = (
+    'жизнь', 'город', 'утро', 'кошка', 'собака', 'море', 'книга', 'работа',
+    'дорога', 'лето', 'зима', 'друг', 'музыка', 'фильм', 'вечер', 'кофе',
+    'новый', 'старый', 'красивый', 'большой', 'тихий', 'смешной', 'читать',
+    'гулять', 'думать', 'писать', 'видеть', 'сегодня', 'вчера', 'снова',
+    'очень', 'наконец', 'python', 'django', 'yatube',
+)
+
+# Seeded posts are spread over this many days back from now.
+HISTORY_DAYS = 365
+
+
+def zipf(count, exponent):
+    """Cumulative weights making rank ``n`` as likely as ``1 / n**s``."""
+    return list(itertools.accumulate(
+        1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def batched(objects, size):
+    objects = iter(objects)
+    while True:
+        batch = list(itertools.islice(objects, size))
+        if not batch:
+            return
+        yield batch
+
+
+@contextlib.contextmanager
+def explicit_dates(model, field_name):
+    """Let bulk_create keep given values of an ``auto_now_add`` field."""
+    field = model._meta.get_field(field_name)
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = ('Fill the database with generated users, groups, posts, '
+            'comments and follows. Popularity of authors and posts '
+            'follows a power law. Derived tables are rebuilt and the '
+            'cache is cleared afterwards.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10_000)
+        parser.add_argument('--groups', type=int, default=100)
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument('--comments', type=int, default=200_000)
+        parser.add_argument('--follows', type=int, default=100_000)
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help='Power law exponent of popularity.')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        self.rand = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.exponent = options['exponent']
+        run = f'{options["seed"]}-{int(time.time())}'
+
+        with transaction.atomic():
+            user_ids = self.create(User, (
+                User(username=f'seed-{run}-{n}', password='!')
+                for n in range(options['users'])))
+            group_ids = self.create(Group, (
+                Group(title=f'Сообщество {n}',
+                      slug=f'seed-{run}-{n}',
+                      description=self.text(5, 20))
+                for n in range(options['groups'])))
+            with explicit_dates(Post, 'pub_date'):
+                post_ids = self.create(Post, (
+                    Post(author_id=author_id,
+                         group_id=self.group(group_ids),
+                         **self.body(5, 60),
+                         pub_date=self.date())
+                    for author_id in self.popular(user_ids,
+                                                  options['posts'])))
+            with explicit_dates(Comment, 'created'):
+                self.create(Comment, (
+                    Comment(post_id=post_id,
+                            author_id=self.rand.choice(user_ids),
+                            **self.body(1, 20),
+                            created=self.date())
+                    for post_id in self.popular(post_ids,
+                                                options['comments'])))
+            self.create(Follow, (
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in zip(
+                    self.rand.choices(user_ids, k=options['follows']),
+                    self.popular(user_ids, options['follows']))
+                if user_id != author_id), ignore_conflicts=True)
+
+            for name, rebuild in (
+                    ('author stats', AuthorStats.objects.rebuild),
+                    ('group stats', GroupStats.objects.rebuild),
+                    ('timelines', timeline.rebuild),
+                    ('search index', search.rebuild),
+                    ('trending scores', trending.rebuild)):
+                started = time.perf_counter()
+                rebuild()
+                self.stdout.write(f'Rebuilt {name} in '
+                                  f'{time.perf_counter() - started:.1f}s')
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS('Done.'))
+
+    def create(self, model, objects, **kwargs):
+        """Insert objects in batches and return ids of the new rows."""
+        last = model.objects.order_by('-pk').values_list(
+            'pk', flat=True).first() or 0
+        started = time.perf_counter()
+        for batch in batched(objects, self.batch_size):
+            model.objects.bulk_create(batch, **kwargs)
+        ids = list(model.objects.filter(pk__gt=last).values_list(
+            'pk', flat=True))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f'Created {len(ids)} {model._meta.model_name} '
+                          f'rows in {elapsed:.1f}s '
+                          f'({len(ids) / max(elapsed, 1e-9):.0f}/s)')
+        return ids
+
+    def popular(self, ids, count):
+        """``count`` picks from ids, the first ones far more often."""
+        if not ids:
+            return []
+        ranked = self.rand.sample(ids, len(ids))
+        weights = zipf(len(ranked), self.exponent)
+        for batch in batched(range(count), self.batch_size):
+            yield from self.rand.choices(ranked, cum_weights=weights,
+                                         k=len(batch))
+
+    def group(self, group_ids):
+        if group_ids and self.rand.random() < 0.7:
+            return self.rand.choice(group_ids)
+        return None
+
+    def text(self, shortest, longest):
+        return ' '.join(self.rand.choices(
+            WORDS, k=self.rand.randint(shortest, longest))).capitalize()
+
+    def body(self, shortest, longest):
+        """Text of a post or comment along with its HTML."""
+        text = self.text(shortest, longest)
+        return {'text': text, 'text_html': markup.render(text)}
+
+    def date(self):
+        return timezone.now() - dt.timedelta(
+            seconds=self.rand.randrange(HISTORY_DAYS * 24 * 3600))
@@ -0,0 +1,41 @@
+"""Post and comment bodies rendered to HTML once, when they are saved.
+
+Templates print the stored ``text_html`` instead of escaping and
+breaking lines of the whole text on every render. After a change of
+``render`` run ``manage.py rerender_text``.
+"""
+from django.template.defaultfilters import linebreaksbr
+from django.utils.safestring import mark_safe
+
+
+def render(text):
+    """Escaped text with line breaks, as ``|linebreaksbr`` prints it."""
+    return linebreaksbr(text, autoescape=True)
+
+
+def html(text, text_html):
+    """Stored HTML, or HTML rendered now for rows saved without it."""
+    return mark_safe(text_html) if text_html else render(text)
+
+
+def rerender(queryset, batch_size=2000):
+    """Render bodies of all rows again, return the number that changed.
+
+    Rows are read by primary key ranges rather than through one cursor,
+    as SQLite gives no isolation between a cursor and writes to its table.
+    """
+    model = queryset.model
+    rows = queryset.order_by('pk').values_list('pk', 'text', 'text_html')
+    changed = last = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last)[:batch_size])
+        if not batch:
+            return changed
+        last = batch[-1][0]
+        stale = [model(pk=pk, text_html=rendered)
+                 for pk, rendered, text_html in (
+                     (pk, render(text), text_html)
+                     for pk, text, text_html in batch)
+                 if rendered != text_html]
+        model.objects.bulk_update(stale, ['text_html'])
+        changed += len(stale)
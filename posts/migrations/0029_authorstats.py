@@ -0,0 +1,50 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:27
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_author_stats(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    AuthorStats = apps.get_model('posts', 'AuthorStats')
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    followers = dict(Follow.objects.values_list('author').annotate(
+        count=Count('id')).order_by())
+    following = dict(Follow.objects.values_list('user').annotate(
+        count=Count('id')).order_by())
+    posts = dict(Post.objects.values_list('author').annotate(
+        count=Count('id')).order_by())
+    AuthorStats.objects.bulk_create(
+        AuthorStats(user_id=user_id,
+                    followers_count=followers.get(user_id, 0),
+                    following_count=following.get(user_id, 0),
+                    posts_count=posts.get(user_id, 0))
+        for user_id in User.objects.values_list('id', flat=True))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0028_auto_20210416_1205'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+                ('followers_count', models.PositiveIntegerField(default=0, verbose_name='Подписчиков')),
+                ('following_count', models.PositiveIntegerField(default=0, verbose_name='Подписан на')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+            ],
+            options={
+                'verbose_name': 'Статистика автора',
+                'verbose_name_plural': 'Статистика авторов',
+            },
+        ),
+        migrations.RunPython(fill_author_stats, migrations.RunPython.noop),
+    ]
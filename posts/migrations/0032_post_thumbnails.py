@@ -0,0 +1,18 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0031_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='thumbnails',
+            field=models.TextField(blank=True, editable=False, help_text='Адреса миниатюр в JSON', verbose_name='Миниатюры'),
+        ),
+    ]
@@ -0,0 +1,123 @@
+# Generated by Django 2.2.6 on 2026-10-18 04:41
+
+import functools
+import re
+import sqlite3
+from collections import Counter
+from itertools import islice
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+# A self-contained port of the Snowball algorithm, free of models.
+from posts.stemmer import stem
+
+FTS_TABLE = 'posts_search'
+
+POST_WEIGHT = 2
+COMMENT_WEIGHT = 1
+
+BATCH_SIZE = 1000
+
+WORD_RE = re.compile(r'\w+')
+
+
+def use_fts(connection):
+    if settings.SEARCH_BACKEND != 'auto':
+        return settings.SEARCH_BACKEND == 'fts5'
+    if connection.vendor != 'sqlite':
+        return False
+    try:
+        sqlite3.connect(':memory:').execute(
+            'CREATE VIRTUAL TABLE probe USING fts5(body)')
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def documents(Post, Comment, stems):
+    """Yield ``(post id, text stems, comment stems)`` of a chunk of posts."""
+    posts = Post.objects.order_by('pk').values_list('pk', 'text').iterator(
+        chunk_size=BATCH_SIZE)
+    while True:
+        batch = list(islice(posts, BATCH_SIZE))
+        if not batch:
+            return
+        comments = {}
+        for post_id, text in Comment.objects.filter(
+                post__in=[pk for pk, _ in batch]).values_list(
+                'post', 'text').iterator():
+            comments.setdefault(post_id, []).extend(stems(text))
+        yield [(pk, stems(text), comments.get(pk, []))
+               for pk, text in batch]
+
+
+def fill_search_index(apps, schema_editor):
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    SearchTerm = apps.get_model('posts', 'SearchTerm')
+    connection = schema_editor.connection
+    fts = use_fts(connection)
+    if fts:
+        schema_editor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS '
+                              f'{FTS_TABLE} USING fts5(text, comments)')
+    cached_stem = functools.lru_cache(maxsize=100_000)(stem)
+    max_length = SearchTerm._meta.get_field('term').max_length
+
+    def stems(text):
+        return [cached_stem(word)[:max_length]
+                for word in WORD_RE.findall(text.lower())]
+
+    for batch in documents(Post, Comment, stems):
+        if fts:
+            with connection.cursor() as cursor:
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE}(rowid, text, comments) '
+                    f'VALUES (%s, %s, %s)',
+                    [(pk, ' '.join(text), ' '.join(comments))
+                     for pk, text, comments in batch])
+            continue
+        terms = []
+        for pk, text, comments in batch:
+            weights = Counter()
+            for term in text:
+                weights[term] += POST_WEIGHT
+            for term in comments:
+                weights[term] += COMMENT_WEIGHT
+            terms += [SearchTerm(term=term, post_id=pk, weight=weight)
+                      for term, weight in weights.items()]
+        SearchTerm.objects.bulk_create(terms)
+
+
+def drop_search_index(apps, schema_editor):
+    if use_fts(schema_editor.connection):
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0033_job'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='Основа слова')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='Вес')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Post', verbose_name='Запись')),
+            ],
+            options={
+                'verbose_name': 'Слово поискового индекса',
+                'verbose_name_plural': 'Поисковый индекс',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='searchterm',
+            constraint=models.UniqueConstraint(fields=('term', 'post'), name='unique_search_term'),
+        ),
+        migrations.RunPython(fill_search_index, drop_search_index),
+    ]
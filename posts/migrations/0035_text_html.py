@@ -0,0 +1,45 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:05
+
+from django.db import migrations, models
+from django.template.defaultfilters import linebreaksbr
+
+BATCH_SIZE = 2000
+
+
+def render_text(apps, schema_editor):
+    # Rows are read by primary key ranges, as SQLite gives a cursor no
+    # isolation from writes to its own table.
+    for name in ('Post', 'Comment'):
+        model = apps.get_model('posts', name)
+        rows = model.objects.order_by('pk').values_list('pk', 'text')
+        last = 0
+        while True:
+            batch = list(rows.filter(pk__gt=last)[:BATCH_SIZE])
+            if not batch:
+                break
+            last = batch[-1][0]
+            model.objects.bulk_update(
+                [model(pk=pk, text_html=linebreaksbr(text, autoescape=True))
+                 for pk, text in batch],
+                ['text_html'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0034_searchterm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, help_text='Экранированный текст с переносами', verbose_name='Комментарий в HTML'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, help_text='Экранированный текст с переносами', verbose_name='Текст в HTML'),
+        ),
+        migrations.RunPython(render_text, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:09
+
+import datetime as dt
+import math
+
+from django.conf import settings
+from django.db import migrations, models
+
+EPOCH = dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+
+BATCH_SIZE = 2000
+
+
+def event_score(weight, when):
+    age = (when - EPOCH).total_seconds()
+    return math.log(weight) + age * math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def add(score, event):
+    high, low = max(score, event), min(score, event)
+    return high + math.log1p(math.exp(low - high))
+
+
+def score_posts(apps, schema_editor):
+    """Score posts by publication and comments, a range of ids at a time."""
+    Post = apps.get_model('posts', 'Post')
+    Comment = apps.get_model('posts', 'Comment')
+    rows = Post.objects.order_by('pk').values_list('pk', 'pub_date')
+    last = 0
+    while True:
+        batch = list(rows.filter(pk__gt=last)[:BATCH_SIZE])
+        if not batch:
+            break
+        last = batch[-1][0]
+        scores = {pk: event_score(settings.TRENDING_POST_WEIGHT, pub_date)
+                  for pk, pub_date in batch}
+        for post_id, created in Comment.objects.filter(
+                post__in=list(scores)).values_list(
+                'post_id', 'created').iterator():
+            scores[post_id] = add(scores[post_id], event_score(
+                settings.TRENDING_COMMENT_WEIGHT, created))
+        Post.objects.bulk_update(
+            [Post(pk=pk, score=score) for pk, score in scores.items()],
+            ['score'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0035_text_html'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='score',
+            field=models.FloatField(default=0, editable=False, help_text='Логарифм веса затухающей активности', verbose_name='Популярность'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['-score', '-id'], name='post_score_idx'),
+        ),
+        migrations.RunPython(score_posts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 2.2.6 on 2026-10-18 05:12
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Max
+import django.db.models.deletion
+import json
+
+
+def fill_group_stats(apps, schema_editor):
+    Group = apps.get_model('posts', 'Group')
+    GroupAuthor = apps.get_model('posts', 'GroupAuthor')
+    GroupStats = apps.get_model('posts', 'GroupStats')
+    Post = apps.get_model('posts', 'Post')
+    grouped = Post.objects.filter(group__isnull=False)
+    GroupAuthor.objects.bulk_create(
+        GroupAuthor(group_id=group_id, author_id=author_id,
+                    posts_count=count)
+        for group_id, author_id, count in grouped.values_list(
+            'group', 'author').annotate(count=Count('id')).order_by())
+    totals = {group_id: (count, last_post)
+              for group_id, count, last_post in grouped.values_list(
+                  'group').annotate(count=Count('id'),
+                                    last=Max('pub_date')).order_by()}
+    stats = []
+    for group_id in Group.objects.values_list('id', flat=True):
+        count, last_post = totals.get(group_id, (0, None))
+        top = GroupAuthor.objects.filter(group_id=group_id).order_by(
+            '-posts_count', 'author_id').values_list(
+            'author__username', 'posts_count')
+        stats.append(GroupStats(
+            group_id=group_id, posts_count=count, last_post=last_post,
+            top_authors=json.dumps(list(top[:settings.GROUP_TOP_AUTHORS]),
+                                   ensure_ascii=False)))
+    GroupStats.objects.bulk_create(stats)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0036_post_score'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupStats',
+            fields=[
+                ('group', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.Group', verbose_name='Группа')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+                ('last_post', models.DateTimeField(blank=True, null=True, verbose_name='Последняя запись')),
+                ('top_authors', models.TextField(default='[]', help_text='Имена и число записей в JSON', verbose_name='Активные авторы')),
+            ],
+            options={
+                'verbose_name': 'Статистика группы',
+                'verbose_name_plural': 'Статистика групп',
+            },
+        ),
+        migrations.CreateModel(
+            name='GroupAuthor',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('posts_count', models.PositiveIntegerField(default=0, verbose_name='Записей')),
+                ('author', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Автор')),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='posts.Group', verbose_name='Группа')),
+            ],
+            options={
+                'verbose_name': 'Автор группы',
+                'verbose_name_plural': 'Авторы групп',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='groupauthor',
+            index=models.Index(fields=['group', '-posts_count'], name='group_author_count_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='groupauthor',
+            constraint=models.UniqueConstraint(fields=('group', 'author'), name='unique_group_author'),
+        ),
+        migrations.RunPython(fill_group_stats, migrations.RunPython.noop),
+    ]
@@ -1,5 +1,12 @@
+import json
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models import Count, F, Max, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from posts import markup
 
 User = get_user_model()
 
@@ -25,10 +32,29 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    """Querysets shared by all post feeds."""
+
+    def feed(self):
+        """Posts with author, group and comments count in a single query.
+
+        Comments are counted by a correlated subquery rather than a JOIN
+        with GROUP BY, so the feed can still be read in index order.
+        """
+        comments = Comment.objects.filter(post=OuterRef('pk')).order_by(
+        ).values('post').annotate(count=Count('*')).values('count')
+        return self.select_related('author', 'group').annotate(
+            comments_count=Coalesce(Subquery(comments), 0))
+
+
 class Post(models.Model):
     """Just a user post."""
     text = models.TextField('Текст заметки',
                             help_text='Введите текст')
+    text_html = models.TextField('Текст в HTML',
+                                 blank=True,
+                                 editable=False,
+                                 help_text='Экранированный текст с переносами')
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
     author = models.ForeignKey(User,
                                on_delete=models.CASCADE,
@@ -43,9 +69,28 @@ class Post(models.Model):
                               blank=True,
                               null=True,
                               verbose_name='Изображение')
+    thumbnails = models.TextField('Миниатюры',
+                                  blank=True,
+                                  editable=False,
+                                  help_text='Адреса миниатюр в JSON')
+    score = models.FloatField('Популярность',
+                              default=0,
+                              editable=False,
+                              help_text='Логарифм веса затухающей активности')
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
         ordering = ('-pub_date',)
+        indexes = [
+            models.Index(fields=['-pub_date', '-id'],
+                         name='post_date_idx'),
+            models.Index(fields=['author', '-pub_date', '-id'],
+                         name='post_author_date_idx'),
+            models.Index(fields=['group', '-pub_date', '-id'],
+                         name='post_group_date_idx'),
+            models.Index(fields=['-score', '-id'],
+                         name='post_score_idx')]
         verbose_name = 'Запись пользователя'
         verbose_name_plural = 'Записи пользователя'
 
@@ -53,6 +98,26 @@ class Post(models.Model):
         """String for representing the Model object."""
         return self.text[:15]
 
+    @property
+    def html(self):
+        return markup.html(self.text, self.text_html)
+
+    @property
+    def thumbnail_urls(self):
+        """Precomputed thumbnail URLs by size, largest first."""
+        return json.loads(self.thumbnails) if self.thumbnails else {}
+
+    @property
+    def image_src(self):
+        """Largest thumbnail, or the original until thumbnails are ready."""
+        urls = self.thumbnail_urls
+        return next(iter(urls.values())) if urls else self.image.url
+
+    @property
+    def image_srcset(self):
+        return ', '.join(f'{url} {size.split("x")[0]}w'
+                         for size, url in self.thumbnail_urls.items())
+
 
 class Comment(models.Model):
     """Users comments to Post."""
@@ -67,9 +132,16 @@ class Comment(models.Model):
                                    auto_now_add=True)
     text = models.TextField('Комментарий',
                             help_text='Оставьте свой комментарий')
+    text_html = models.TextField('Комментарий в HTML',
+                                 blank=True,
+                                 editable=False,
+                                 help_text='Экранированный текст с переносами')
 
     class Meta:
         ordering = ('-created',)
+        indexes = [
+            models.Index(fields=['post', '-created', '-id'],
+                         name='comment_post_created_idx')]
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
 
@@ -77,6 +149,10 @@ class Comment(models.Model):
         """String for representing Model Object."""
         return self.text[:30]
 
+    @property
+    def html(self):
+        return markup.html(self.text, self.text_html)
+
 
 class Follow(models.Model):
     user = models.ForeignKey(User,
@@ -93,6 +169,9 @@ class Follow(models.Model):
             models.UniqueConstraint(
                 fields=['user', 'author'],
                 name='unique_follow')]
+        indexes = [
+            models.Index(fields=['author', 'user'],
+                         name='follow_author_user_idx')]
 
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'
@@ -100,3 +179,277 @@ class Follow(models.Model):
     def __str__(self):
         """String for representing Model Object."""
         return f'subscribe: {self.user.username} for {self.author.username}'
+
+
+class AuthorStatsManager(models.Manager):
+    def bump(self, user_id, **deltas):
+        """Shift counters of one user by the given deltas.
+
+        Users saved without signals have no row yet, theirs is recounted.
+        """
+        if not self.filter(user_id=user_id).update(
+                **{field: F(field) + delta
+                   for field, delta in deltas.items()}):
+            self.rebuild([user_id])
+
+    def rebuild(self, user_ids=None):
+        """Recount counters of every user, or only of the given ones."""
+        users = User.objects.values_list('id', flat=True)
+        if user_ids is not None:
+            users = users.filter(id__in=user_ids)
+        followers = dict(Follow.objects.filter(author__in=users).values_list(
+            'author').annotate(count=Count('id')).order_by())
+        following = dict(Follow.objects.filter(user__in=users).values_list(
+            'user').annotate(count=Count('id')).order_by())
+        posts = dict(Post.objects.filter(author__in=users).values_list(
+            'author').annotate(count=Count('id')).order_by())
+        self.filter(user__in=users).delete()
+        self.bulk_create(
+            (self.model(user_id=user_id,
+                        followers_count=followers.get(user_id, 0),
+                        following_count=following.get(user_id, 0),
+                        posts_count=posts.get(user_id, 0))
+             for user_id in users))
+
+
+class AuthorStats(models.Model):
+    """Denormalized counters for the author card."""
+    user = models.OneToOneField(User,
+                                on_delete=models.CASCADE,
+                                primary_key=True,
+                                related_name='stats',
+                                verbose_name='Пользователь')
+    followers_count = models.PositiveIntegerField('Подписчиков', default=0)
+    following_count = models.PositiveIntegerField('Подписан на', default=0)
+    posts_count = models.PositiveIntegerField('Записей', default=0)
+
+    objects = AuthorStatsManager()
+
+    class Meta:
+        verbose_name = 'Статистика автора'
+        verbose_name_plural = 'Статистика авторов'
+
+    def __str__(self):
+        """String for representing Model Object."""
+        return f'stats: {self.user.username}'
+
+
+class GroupStatsManager(models.Manager):
+    def add_post(self, group_id, author_id, pub_date):
+        """Count a post published in or moved into the group."""
+        counted = GroupAuthor.objects.filter(group_id=group_id,
+                                             author_id=author_id)
+        if not counted.update(posts_count=F('posts_count') + 1):
+            GroupAuthor.objects.create(group_id=group_id,
+                                       author_id=author_id,
+                                       posts_count=1)
+        self.filter(group_id=group_id).update(
+            posts_count=F('posts_count') + 1)
+        self.filter(Q(last_post__lt=pub_date) | Q(last_post__isnull=True),
+                    group_id=group_id).update(last_post=pub_date)
+        self.refresh_top_authors(group_id)
+
+    def remove_post(self, group_id, author_id):
+        """Uncount a post deleted from or moved out of the group."""
+        GroupAuthor.objects.filter(
+            group_id=group_id, author_id=author_id).update(
+            posts_count=F('posts_count') - 1)
+        GroupAuthor.objects.filter(group_id=group_id,
+                                   posts_count__lte=0).delete()
+        last_post = Post.objects.filter(group_id=group_id).order_by(
+            '-pub_date', '-id').values_list('pub_date', flat=True).first()
+        self.filter(group_id=group_id).update(
+            posts_count=F('posts_count') - 1, last_post=last_post)
+        self.refresh_top_authors(group_id)
+
+    def refresh_top_authors(self, group_id):
+        top = GroupAuthor.objects.filter(group_id=group_id).order_by(
+            '-posts_count', 'author_id').values_list(
+            'author__username', 'posts_count')
+        self.filter(group_id=group_id).update(top_authors=json.dumps(
+            list(top[:settings.GROUP_TOP_AUTHORS]), ensure_ascii=False))
+
+    def rebuild(self, group_ids=None):
+        """Recount counters of every group, or only of the given ones."""
+        groups = Group.objects.values_list('id', flat=True)
+        if group_ids is not None:
+            groups = groups.filter(id__in=group_ids)
+        grouped = Post.objects.filter(group__in=groups)
+        GroupAuthor.objects.filter(group__in=groups).delete()
+        GroupAuthor.objects.bulk_create(
+            GroupAuthor(group_id=group_id, author_id=author_id,
+                        posts_count=count)
+            for group_id, author_id, count in grouped.values_list(
+                'group', 'author').annotate(count=Count('id')).order_by())
+        totals = {group_id: (count, last_post)
+                  for group_id, count, last_post in grouped.values_list(
+                      'group').annotate(count=Count('id'),
+                                        last=Max('pub_date')).order_by()}
+        self.filter(group__in=groups).delete()
+        self.bulk_create(
+            self.model(group_id=group_id,
+                       posts_count=totals.get(group_id, (0, None))[0],
+                       last_post=totals.get(group_id, (0, None))[1])
+            for group_id in groups)
+        for group_id in totals:
+            self.refresh_top_authors(group_id)
+
+
+class GroupStats(models.Model):
+    """Denormalized counters for the group directory."""
+    group = models.OneToOneField(Group,
+                                 on_delete=models.CASCADE,
+                                 primary_key=True,
+                                 related_name='stats',
+                                 verbose_name='Группа')
+    posts_count = models.PositiveIntegerField('Записей', default=0)
+    last_post = models.DateTimeField('Последняя запись',
+                                     blank=True,
+                                     null=True)
+    top_authors = models.TextField('Активные авторы',
+                                   default='[]',
+                                   help_text='Имена и число записей в JSON')
+
+    objects = GroupStatsManager()
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
+    def __str__(self):
+        """String for representing Model Object."""
+        return f'stats: {self.group.title}'
+
+    @property
+    def top_authors_list(self):
+        """Pairs of username and posts count, most active first."""
+        return json.loads(self.top_authors)
+
+
+class GroupAuthor(models.Model):
+    """Posts of one author in one group, to pick the most active ones."""
+    group = models.ForeignKey(Group,
+                              on_delete=models.CASCADE,
+                              related_name='+',
+                              verbose_name='Группа')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='+',
+                               verbose_name='Автор')
+    posts_count = models.PositiveIntegerField('Записей', default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['group', 'author'],
+                name='unique_group_author')]
+        indexes = [
+            models.Index(fields=['group', '-posts_count'],
+                         name='group_author_count_idx')]
+
+        verbose_name = 'Автор группы'
+        verbose_name_plural = 'Авторы групп'
+
+    def __str__(self):
+        """String for representing Model Object."""
+        return f'group author: {self.author_id} in {self.group_id}'
+
+
+class TimelineEntry(models.Model):
+    """Post delivered to a follower's subscription feed on write."""
+    user = models.ForeignKey(User,
+                             on_delete=models.CASCADE,
+                             related_name='timeline',
+                             verbose_name='Подписчик')
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='timeline_entries',
+                             verbose_name='Запись')
+    author = models.ForeignKey(User,
+                               on_delete=models.CASCADE,
+                               related_name='+',
+                               verbose_name='Автор')
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        ordering = ('-pub_date',)
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry')]
+        indexes = [
+            models.Index(fields=['user', '-pub_date', '-post'],
+                         name='timeline_user_date_idx'),
+            models.Index(fields=['user', 'author'],
+                         name='timeline_user_author_idx')]
+
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Записи ленты'
+
+    def __str__(self):
+        """String for representing Model Object."""
+        return f'timeline: {self.user_id} <- {self.post_id}'
+
+
+class Job(models.Model):
+    """Deferred call of a function by its dotted path."""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (FAILED, 'Ошибка'),
+    )
+
+    task = models.CharField('Задача', max_length=200)
+    payload = models.TextField('Аргументы', default='[]')
+    status = models.CharField('Статус',
+                              max_length=10,
+                              choices=STATUSES,
+                              default=PENDING)
+    attempts = models.PositiveSmallIntegerField('Попыток', default=0)
+    run_at = models.DateTimeField('Запустить после')
+    claimed_at = models.DateTimeField('Взята в работу',
+                                      blank=True,
+                                      null=True)
+    created = models.DateTimeField('Создана', auto_now_add=True)
+    last_error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        ordering = ('run_at',)
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='job_status_run_at_idx')]
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        """String for representing Model Object."""
+        return f'{self.task} ({self.status})'
+
+
+class SearchTerm(models.Model):
+    """Inverted index entry: a word stem found in a post or its comments.
+
+    Used for search on databases without SQLite FTS5.
+    """
+    term = models.CharField('Основа слова', max_length=64)
+    post = models.ForeignKey(Post,
+                             on_delete=models.CASCADE,
+                             related_name='+',
+                             verbose_name='Запись')
+    weight = models.PositiveIntegerField('Вес', default=1)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['term', 'post'],
+                name='unique_search_term')]
+
+        verbose_name = 'Слово поискового индекса'
+        verbose_name_plural = 'Поисковый индекс'
+
+    def __str__(self):
+        """String for representing Model Object."""
+        return f'search: {self.term} -> {self.post_id}'
@@ -0,0 +1,103 @@
+import json
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+class CursorPaginator(Paginator):
+    """Keyset paginator addressed by opaque cursors instead of numbers.
+
+    Rows are ordered by ``ordering``, whose last field must be unique, and
+    every page is read with a ``WHERE (pub_date, id) < (...)`` range
+    condition, so deep pages cost the same as the first one. ``count`` is
+    inherited and lazy: it runs only if a template asks for it.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-pub_date', '-id')):
+        super().__init__(object_list.order_by(*ordering), per_page)
+        self.ordering = ordering
+        self.next_cursor = None
+        self.previous_cursor = None
+        self._num_pages = 1
+
+    @property
+    def num_pages(self):
+        """Pages known around the current one: previous, current, next."""
+        return self._num_pages
+
+    def get_page(self, cursor):
+        return self.page(cursor)
+
+    def page(self, cursor=None):
+        position = self.decode(cursor)
+        backwards = position is not None and position[0]
+        rows = self.fetch(position, self.per_page + 1)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        if backwards:
+            rows.reverse()
+            has_previous, has_next = has_more, True
+        else:
+            has_previous, has_next = position is not None, has_more
+        self.previous_cursor = (
+            self.encode(True, rows[0]) if rows and has_previous else None)
+        self.next_cursor = (
+            self.encode(False, rows[-1]) if rows and has_next else None)
+        number = 2 if self.previous_cursor else 1
+        self._num_pages = number + 1 if self.next_cursor else number
+        return Page(rows, number, self)
+
+    def fetch(self, position, limit):
+        """Up to ``limit`` rows beyond the position, in paging direction."""
+        queryset = self.object_list
+        if position is not None:
+            backwards, values = position
+            queryset = queryset.filter(self.beyond(values, backwards))
+            if backwards:
+                queryset = queryset.reverse()
+        return list(queryset[:limit])
+
+    def beyond(self, values, backwards, ordering=None):
+        """Condition selecting rows after ``values`` in paging direction.
+
+        ``ordering`` names the fields holding the values when they differ
+        from the paginated ones. The non-strict bound on the leading field
+        duplicates the OR chain but lets the database turn it into an
+        index range read.
+        """
+        condition = Q()
+        equal = {}
+        bound = None
+        for field, value in zip(ordering or self.ordering, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != backwards
+            lookup = 'lt' if descending else 'gt'
+            condition |= Q(**equal, **{f'{name}__{lookup}': value})
+            equal[name] = value
+            if bound is None:
+                bound = Q(**{f'{name}__{lookup}e': value})
+        return bound & condition
+
+    def encode(self, backwards, row):
+        meta = self.object_list.model._meta
+        values = [meta.get_field(field.lstrip('-')).value_to_string(row)
+                  for field in self.ordering]
+        data = json.dumps([backwards, values])
+        return urlsafe_base64_encode(data.encode())
+
+    def decode(self, cursor):
+        """Return ``(backwards, values)`` or None for a broken cursor."""
+        if not cursor:
+            return None
+        meta = self.object_list.model._meta
+        try:
+            backwards, values = json.loads(urlsafe_base64_decode(cursor))
+            if len(values) != len(self.ordering):
+                return None
+            return bool(backwards), [
+                meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)]
+        except (TypeError, ValueError, FieldDoesNotExist, ValidationError):
+            return None
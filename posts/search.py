@@ -0,0 +1,190 @@
+"""Full-text search over posts and their comments.
+
+A post together with its comments is one document. Words are reduced to
+Russian stems, so "подписки" also finds "подписка". On SQLite documents
+live in an FTS5 table ranked by bm25; other databases fall back to the
+``SearchTerm`` inverted index ranked by weighted term counts. Saved
+posts are reindexed by a queued job, so saving a post does not wait for
+the index. Changes of comments are indexed by one queued job per post
+after ``SEARCH_REINDEX_DELAY``, so a busy thread is not reindexed for
+every comment.
+"""
+import functools
+import re
+import sqlite3
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Sum
+
+from posts.jobs import enqueue_once
+from posts.models import Comment, Post, SearchTerm
+from posts.stemmer import stem
+
+FTS_TABLE = 'posts_search'
+
+# Words of the post itself weigh more than words of its comments.
+POST_WEIGHT = 2
+COMMENT_WEIGHT = 1
+
+WORD_RE = re.compile(r'\w+')
+
+# Texts repeat the same words, stemming each of them once is plenty.
+cached_stem = functools.lru_cache(maxsize=100_000)(stem)
+
+
+@functools.lru_cache()
+def fts5_available():
+    """Whether the SQLite library was built with FTS5."""
+    try:
+        sqlite3.connect(':memory:').execute(
+            'CREATE VIRTUAL TABLE probe USING fts5(body)')
+    except sqlite3.OperationalError:
+        return False
+    return True
+
+
+def use_fts(using=connection):
+    if settings.SEARCH_BACKEND == 'auto':
+        return using.vendor == 'sqlite' and fts5_available()
+    return settings.SEARCH_BACKEND == 'fts5'
+
+
+def create_fts_table(using=connection):
+    with using.cursor() as cursor:
+        cursor.execute(f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} '
+                       f'USING fts5(text, comments)')
+
+
+def stems(text):
+    return [cached_stem(word) for word in WORD_RE.findall(text.lower())]
+
+
+def terms(text, comments):
+    """Weighted stems of a post and its comments."""
+    max_length = SearchTerm._meta.get_field('term').max_length
+    weights = Counter()
+    for term in stems(text):
+        weights[term[:max_length]] += POST_WEIGHT
+    for comment in comments:
+        for term in stems(comment):
+            weights[term[:max_length]] += COMMENT_WEIGHT
+    return weights
+
+
+def documents(posts, comments, batch_size=1000):
+    """Yield ``(post id, text, comment texts)`` in batches by id."""
+    last = 0
+    while True:
+        batch = list(posts.filter(pk__gt=last).order_by('pk').values_list(
+            'pk', 'text')[:batch_size])
+        if not batch:
+            return
+        last = batch[-1][0]
+        texts = {}
+        for post_id, text in comments.filter(
+                post__in=[pk for pk, _ in batch]).values_list('post', 'text'):
+            texts.setdefault(post_id, []).append(text)
+        for pk, text in batch:
+            yield pk, text, texts.get(pk, [])
+
+
+def store(docs, using=connection, term_model=SearchTerm):
+    """Write documents to the index, replacing their previous versions.
+
+    ``using`` and ``term_model`` let migrations fill the index with
+    historical models.
+    """
+    docs = list(docs)
+    if use_fts(using):
+        with using.cursor() as cursor:
+            cursor.executemany(
+                f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                [(pk,) for pk, _, _ in docs])
+            cursor.executemany(
+                f'INSERT INTO {FTS_TABLE}(rowid, text, comments) '
+                f'VALUES (%s, %s, %s)',
+                [(pk, ' '.join(stems(text)), ' '.join(stems(' '.join(texts))))
+                 for pk, text, texts in docs])
+    else:
+        term_model.objects.filter(post__in=[pk for pk, _, _ in docs]).delete()
+        term_model.objects.bulk_create(
+            term_model(term=term, post_id=pk, weight=weight)
+            for pk, text, texts in docs
+            for term, weight in terms(text, texts).items())
+
+
+def reindex(post_id):
+    """Bring the document of one post up to date."""
+    text = Post.objects.filter(pk=post_id).values_list(
+        'text', flat=True).first()
+    if text is None:
+        remove(post_id)
+        return
+    comments = Comment.objects.filter(post=post_id).values_list(
+        'text', flat=True)
+    store([(post_id, text, list(comments))])
+
+
+def reindex_soon(post_id, delay=None):
+    """Reindex a post once after a burst of changes.
+
+    Without a delay given the job waits ``SEARCH_REINDEX_DELAY``.
+    """
+    if delay is None:
+        delay = settings.SEARCH_REINDEX_DELAY
+    enqueue_once(reindex, post_id, delay=delay)
+
+
+def remove(post_id):
+    # Inverted index rows go away with the post by cascade.
+    if use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s',
+                           [post_id])
+
+
+def rebuild(post_ids=None, batch_size=1000):
+    """Index every post from scratch, or only the given posts."""
+    if use_fts():
+        # The table is only made by migrations run with FTS5 in use.
+        create_fts_table()
+    posts = Post.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+    elif use_fts():
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {FTS_TABLE}')
+    else:
+        SearchTerm.objects.all().delete()
+    docs = documents(posts, Comment.objects.all(), batch_size)
+    batch = []
+    for doc in docs:
+        batch.append(doc)
+        if len(batch) == batch_size:
+            store(batch)
+            batch = []
+    store(batch)
+
+
+def search(query, limit=None):
+    """Ids of posts containing every word of the query, best first."""
+    words = sorted(set(stems(query)))
+    if not words:
+        return []
+    limit = limit or settings.SEARCH_MAX_RESULTS
+    if use_fts():
+        match = ' '.join(f'"{word}"' for word in words)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} '
+                f'WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, {POST_WEIGHT}, {COMMENT_WEIGHT})'
+                f' LIMIT %s',
+                [match, limit])
+            return [pk for pk, in cursor.fetchall()]
+    matches = SearchTerm.objects.filter(term__in=words).values(
+        'post').annotate(matched=Count('id'), score=Sum('weight')).filter(
+        matched=len(words)).order_by('-score', '-post')
+    return list(matches.values_list('post', flat=True)[:limit])
@@ -0,0 +1,209 @@
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.db.models.signals import (post_delete, post_init, post_save,
+                                      pre_delete, pre_save)
+from django.dispatch import receiver
+
+from posts import following, markup, search, timeline, trending
+from posts.cache import (group_scopes, invalidate, mark_modified,
+                         post_scopes)
+from posts.models import (AuthorStats, Comment, Follow, Group, GroupStats,
+                          Post, User)
+
+
+@receiver(connection_created)
+def tune_sqlite(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+@receiver(pre_save, sender=Post)
+@receiver(pre_save, sender=Comment)
+def render_text(sender, instance, **kwargs):
+    instance.text_html = markup.render(instance.text)
+
+
+@receiver(pre_save, sender=Post)
+def score_new_post(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance.score = trending.event_score(
+            settings.TRENDING_POST_WEIGHT, instance.pub_date)
+
+
+@receiver(post_save, sender=User)
+def create_author_stats(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.get_or_create(user=instance)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_save, sender=Post)
+def count_group_post(sender, instance, created, **kwargs):
+    """Count new posts and posts moved between groups."""
+    old_group_id = None if created else instance._counted_group_id
+    if old_group_id == instance.group_id and not created:
+        return
+    if old_group_id is not None:
+        GroupStats.objects.remove_post(old_group_id, instance.author_id)
+    if instance.group_id is not None:
+        GroupStats.objects.add_post(instance.group_id, instance.author_id,
+                                    instance.pub_date)
+    instance._counted_group_id = instance.group_id
+
+
+@receiver(post_delete, sender=Post)
+def uncount_group_post(sender, instance, **kwargs):
+    if instance.group_id is not None:
+        GroupStats.objects.remove_post(instance.group_id, instance.author_id)
+
+
+@receiver(post_save, sender=Post)
+def count_new_post(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.bump(instance.author_id, posts_count=1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    AuthorStats.objects.bump(instance.author_id, posts_count=-1)
+
+
+@receiver(post_save, sender=Follow)
+def count_new_follow(sender, instance, created, **kwargs):
+    if created:
+        AuthorStats.objects.bump(instance.author_id, followers_count=1)
+        AuthorStats.objects.bump(instance.user_id, following_count=1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    AuthorStats.objects.bump(instance.author_id, followers_count=-1)
+    AuthorStats.objects.bump(instance.user_id, following_count=-1)
+
+
+@receiver(post_save, sender=Post)
+def deliver_new_post(sender, instance, created, **kwargs):
+    if created:
+        timeline.fan_out(instance)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created:
+        timeline.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def clean_timeline(sender, instance, **kwargs):
+    timeline.remove(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def restore_timelines(sender, instance, **kwargs):
+    timeline.restore(instance.author_id)
+
+
+@receiver(post_init, sender=Post)
+def remember_group(sender, instance, **kwargs):
+    instance._original_group_id = instance.group_id
+    instance._counted_group_id = instance.group_id
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    invalidate(*post_scopes(instance, [instance._original_group_id]))
+    instance._original_group_id = instance.group_id
+
+
+def group_author_ids(group):
+    return set(Post.objects.filter(group=group).values_list(
+        'author_id', flat=True).distinct())
+
+
+@receiver(pre_delete, sender=Group)
+def remember_group_authors(sender, instance, **kwargs):
+    # Posts lose their group by an UPDATE that sends no signals.
+    instance._author_ids = group_author_ids(instance)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_feeds(sender, instance, created=False, **kwargs):
+    """Drop cached feeds showing the old title or a deleted group."""
+    if created:
+        return
+    author_ids = instance.__dict__.pop('_author_ids', None)
+    if author_ids is None:
+        author_ids = group_author_ids(instance)
+    invalidate(*group_scopes(instance.pk, author_ids))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_feeds(sender, instance, **kwargs):
+    try:
+        post = instance.post
+    except Post.DoesNotExist:
+        return
+    invalidate(*post_scopes(post))
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_feed(sender, instance, **kwargs):
+    invalidate(f'follow:{instance.user_id}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def forget_followed_ids(sender, instance, **kwargs):
+    following.forget(instance.user_id)
+
+
+@receiver(post_save, sender=Comment)
+def score_comment(sender, instance, created, **kwargs):
+    if created:
+        trending.on_comment(instance)
+
+
+@receiver(post_save, sender=Follow)
+def score_follow(sender, instance, created, **kwargs):
+    if created:
+        trending.on_follow(instance)
+
+
+@receiver(post_save, sender=Post)
+def index_post(sender, instance, **kwargs):
+    search.reindex_soon(instance.pk, delay=0)
+
+
+@receiver(post_delete, sender=Post)
+def unindex_post(sender, instance, **kwargs):
+    search.remove(instance.pk)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def index_comment(sender, instance, **kwargs):
+    search.reindex_soon(instance.post_id)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def touch_content(sender, **kwargs):
+    mark_modified()
@@ -0,0 +1,101 @@
+"""Snowball stemmer for Russian.
+
+A straight port of the algorithm described at
+https://snowballstem.org/algorithms/russian/stemmer.html
+"""
+VOWELS = 'аеиоуыэюя'
+
+PERFECTIVE_GERUND = (
+    ('в', 'вши', 'вшись'),
+    ('ив', 'ивши', 'ившись', 'ыв', 'ывши', 'ывшись'),
+)
+ADJECTIVE = (
+    'ее', 'ие', 'ые', 'ое', 'ими', 'ыми', 'ей', 'ий', 'ый', 'ой', 'ем',
+    'им', 'ым', 'ом', 'его', 'ого', 'ему', 'ому', 'их', 'ых', 'ую', 'юю',
+    'ая', 'яя', 'ою', 'ею',
+)
+PARTICIPLE = (
+    ('ем', 'нн', 'вш', 'ющ', 'щ'),
+    ('ивш', 'ывш', 'ующ'),
+)
+REFLEXIVE = ('ся', 'сь')
+VERB = (
+    ('ла', 'на', 'ете', 'йте', 'ли', 'й', 'л', 'ем', 'н', 'ло', 'но', 'ет',
+     'ют', 'ны', 'ть', 'ешь', 'нно'),
+    ('ила', 'ыла', 'ена', 'ейте', 'уйте', 'ите', 'или', 'ыли', 'ей', 'уй',
+     'ил', 'ыл', 'им', 'ым', 'ен', 'ило', 'ыло', 'ено', 'ят', 'ует', 'уют',
+     'ит', 'ыт', 'ены', 'ить', 'ыть', 'ишь', 'ую', 'ю'),
+)
+NOUN = (
+    'а', 'ев', 'ов', 'ие', 'ье', 'е', 'иями', 'ями', 'ами', 'еи', 'ии', 'и',
+    'ией', 'ей', 'ой', 'ий', 'й', 'иям', 'ям', 'ием', 'ем', 'ам', 'ом', 'о',
+    'у', 'ах', 'иях', 'ях', 'ы', 'ь', 'ию', 'ью', 'ю', 'ия', 'ья', 'я',
+)
+SUPERLATIVE = ('ейш', 'ейше')
+DERIVATIONAL = ('ост', 'ость')
+
+
+def region(word, start=0):
+    """Index after the first non-vowel that follows a vowel."""
+    for i in range(start + 1, len(word)):
+        if word[i] not in VOWELS and word[i - 1] in VOWELS:
+            return i + 1
+    return len(word)
+
+
+def ending(word, start, endings, after_a=()):
+    """Length of the longest ending found in ``word[start:]``, or 0.
+
+    ``after_a`` endings only count when preceded by "а" or "я".
+    """
+    best = 0
+    for suffix in after_a:
+        size = len(suffix)
+        if (size > best and word.endswith(suffix)
+                and len(word) - size - 1 >= start
+                and word[-size - 1] in 'ая'):
+            best = size
+    for suffix in endings:
+        size = len(suffix)
+        if (size > best and word.endswith(suffix)
+                and len(word) - size >= start):
+            best = size
+    return best
+
+
+def cut(word, size):
+    return word[:-size] if size else word
+
+
+def stem(word):
+    word = word.lower().replace('ё', 'е')
+    rv = next((i + 1 for i, char in enumerate(word) if char in VOWELS),
+              len(word))
+    r2 = region(word, region(word))
+
+    size = ending(word, rv, PERFECTIVE_GERUND[1], PERFECTIVE_GERUND[0])
+    if size:
+        word = cut(word, size)
+    else:
+        word = cut(word, ending(word, rv, REFLEXIVE))
+        size = ending(word, rv, ADJECTIVE)
+        if size:
+            word = cut(word, size)
+            word = cut(word, ending(word, rv, PARTICIPLE[1], PARTICIPLE[0]))
+        else:
+            size = ending(word, rv, VERB[1], VERB[0])
+            word = cut(word, size or ending(word, rv, NOUN))
+
+    if word.endswith('и') and len(word) - 1 >= rv:
+        word = word[:-1]
+
+    word = cut(word, ending(word, r2, DERIVATIONAL))
+
+    size = ending(word, rv, SUPERLATIVE)
+    if size:
+        word = cut(word, size)
+    if word.endswith('нн') and len(word) - 1 >= rv:
+        word = word[:-1]
+    elif not size and word.endswith('ь') and len(word) - 1 >= rv:
+        word = word[:-1]
+    return word
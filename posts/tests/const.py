@@ -14,16 +14,21 @@ USER_NAME = 'test_username'
 # URL
 
 ABOUT_TECH_URL = reverse('about:tech')
+API_COMMENTS_URL = reverse('api_comments')
+API_POSTS_URL = reverse('api_posts')
 ABOUT_URL = reverse('about:author')
 FOLLOW_INDEX_URL = reverse('follow_index')
 FOLLOW_URL = reverse('profile_follow', kwargs={'username': AUTHOR_NAME})
 GROUP_URL = reverse('group_posts', kwargs={'slug': SLUG})
 GROUP2_URL = reverse('group_posts', kwargs={'slug': SLUG2})
+GROUPS_URL = reverse('groups')
 INDEX_URL = reverse('index')
 NEW_POST_URL = reverse('new_post')
 NOT_EXIST_URL = '/about/tech15667/'
+PERF_STATS_URL = reverse('perf_stats')
 PROFILE_AUTHOR_URL = reverse('profile', kwargs={'username': AUTHOR_NAME})
 PROFILE_USER_URL = reverse('profile', kwargs={'username': USER_NAME})
+SEARCH_URL = reverse('search')
 UNFOLLOW_URL = reverse('profile_unfollow', kwargs={'username': AUTHOR_NAME})
 
 REDIRECT_AUTH = '/auth/login/?next='
@@ -0,0 +1,13 @@
+import asyncio
+
+from django.test import TestCase
+
+from posts.management.commands.bench_asgi import asgi_get
+from posts.tests import const
+
+
+class ASGITest(TestCase):
+    def test_asgi_application_serves_pages(self):
+        """Pages are served through the ASGI entry point."""
+        self.assertEqual(asyncio.run(asgi_get(const.ABOUT_URL)), 200)
+        self.assertEqual(asyncio.run(asgi_get(const.NOT_EXIST_URL)), 404)
@@ -1,9 +1,19 @@
 import datetime as dt
+import shutil
+import tempfile
+import time
+from unittest import mock
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils.http import http_date
 
-from posts.models import Group, Post
+from posts.cache import MODIFIED_KEY, VERSION_KEY, feed_version, invalidate
+from posts.models import Comment, Follow, Group, Post
 from posts.tests import const
 
 User = get_user_model()
@@ -11,6 +21,7 @@ User = get_user_model()
 
 class PostsCacheTest(TestCase):
     def setUp(self):
+        cache.clear()
         self.guest_client = Client()
         self.user = User.objects.create_user(username=const.USER_NAME)
         self.authorized_client = Client()
@@ -21,23 +32,215 @@ class PostsCacheTest(TestCase):
             slug=const.SLUG,
             description=const.DESCRIPTION
         )
+        self.group2 = Group.objects.create(
+            title=const.GROUP_NAME2,
+            slug=const.SLUG2,
+            description=const.DESCRIPTION
+        )
 
-        Post.objects.create(
+        self.post = Post.objects.create(
             text=const.POST_TEXT,
             pub_date=dt.datetime.now(),
             author=self.user,
             group=self.group
         )
 
+    def test_cache_hit(self):
+        """Unchanged feeds are served from cache."""
+        for url in (const.INDEX_URL, const.GROUP_URL,
+                    const.PROFILE_USER_URL):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                # queryset update() skips signals, so versions stay put
+                Post.objects.update(text=const.POST_TEXT2,
+                                    text_html=const.POST_TEXT2)
+                response2 = self.guest_client.get(url)
+                Post.objects.update(text=const.POST_TEXT,
+                                    text_html=const.POST_TEXT)
+                self.assertEqual(response.content, response2.content)
+
+    def test_cache_miss_on_other_page(self):
+        """Pages of one feed are cached separately."""
+        response = self.guest_client.get(const.INDEX_URL)
+        Post.objects.update(text=const.POST_TEXT2,
+                            text_html=const.POST_TEXT2)
+        response2 = self.guest_client.get(const.INDEX_URL + '?cursor=x')
+        self.assertNotEqual(response.content, response2.content)
+
     def test_cache_index(self):
-        """Cache works correctly on index page."""
+        """New post invalidates index, group and profile pages at once."""
+        for url in (const.INDEX_URL, const.GROUP_URL,
+                    const.PROFILE_USER_URL):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                data = {
+                    'text': const.POST_TEXT2 + url,
+                    'group': self.group.id}
+                self.authorized_client.post(
+                    const.NEW_POST_URL,
+                    data=data,
+                    follow=True)
+                response2 = self.guest_client.get(url)
+                self.assertNotEqual(response.content, response2.content)
+                self.assertContains(response2, const.POST_TEXT2 + url)
+
+    def test_cache_invalidated_on_group_move(self):
+        """Moving a post to another group invalidates both groups."""
+        self.guest_client.get(const.GROUP_URL)
+        self.guest_client.get(const.GROUP2_URL)
+        self.post.group = self.group2
+        self.post.save()
+        response = self.guest_client.get(const.GROUP_URL)
+        response2 = self.guest_client.get(const.GROUP2_URL)
+        self.assertNotIn(self.post, response.context['page'])
+        self.assertContains(response2, f'post_{self.post.id}')
+        self.assertNotContains(response, f'post_{self.post.id}')
+
+    def test_cache_invalidated_on_comment_and_delete(self):
+        """Comments and deletions invalidate the feed."""
+        self.guest_client.get(const.INDEX_URL)
+        Comment.objects.create(
+            text=const.COMMENT_TEXT, author=self.user, post=self.post)
+        response = self.guest_client.get(const.INDEX_URL)
+        self.assertContains(response, 'Комментариев: 1')
+        self.post.delete()
         response = self.guest_client.get(const.INDEX_URL)
-        data = {
-            'text': const.POST_TEXT2,
-            'group': self.group.id}
-        self.authorized_client.post(
-            const.NEW_POST_URL,
-            data=data,
-            follow=True)
-        response2 = self.guest_client.get(const.INDEX_URL)
-        self.assertEqual(response.content, response2.content)
+        self.assertNotContains(response, f'post_{self.post.id}')
+
+    def test_cache_invalidated_on_group_rename_and_delete(self):
+        """Renamed and deleted groups leave no stale cards behind."""
+        urls = (const.INDEX_URL, const.GROUP_URL, const.PROFILE_USER_URL)
+        for url in urls:
+            self.guest_client.get(url)
+        self.group.title = const.GROUP_NAME2 + '_renamed'
+        self.group.save()
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    const.GROUP_NAME2 + '_renamed')
+        self.group.delete()
+        for url in (const.INDEX_URL, const.PROFILE_USER_URL):
+            with self.subTest(url=url):
+                self.assertNotContains(self.guest_client.get(url),
+                                       const.GROUP_URL)
+
+    def test_equal_versions_of_other_scopes(self):
+        """Feeds of different groups and authors never share fragments."""
+        author = User.objects.create_user(username=const.AUTHOR_NAME)
+        Post.objects.create(text=const.POST_TEXT2, author=author,
+                            group=self.group2)
+        for scope in (f'group:{self.group.id}', f'group:{self.group2.id}',
+                      f'profile:{self.user.id}', f'profile:{author.id}'):
+            cache.set(VERSION_KEY.format(scope), 1, None)
+        for first, second in ((const.GROUP_URL, const.GROUP2_URL),
+                              (const.PROFILE_USER_URL,
+                               const.PROFILE_AUTHOR_URL)):
+            with self.subTest(url=second):
+                self.authorized_client.get(first)
+                self.assertContains(self.authorized_client.get(second),
+                                    const.POST_TEXT2)
+
+    def test_cache_follow_index(self):
+        """Follow and unfollow invalidate the subscription feed."""
+        author = User.objects.create_user(username=const.AUTHOR_NAME)
+        post = Post.objects.create(text=const.POST_TEXT2, author=author)
+        anchor = f'name="post_{post.id}"'
+        response = self.authorized_client.get(const.FOLLOW_INDEX_URL)
+        self.assertNotContains(response, anchor)
+        Follow.objects.create(user=self.user, author=author)
+        response = self.authorized_client.get(const.FOLLOW_INDEX_URL)
+        self.assertContains(response, anchor)
+        self.authorized_client.get(
+            reverse('profile_unfollow', kwargs={'username': author}))
+        response = self.authorized_client.get(const.FOLLOW_INDEX_URL)
+        self.assertNotContains(response, anchor)
+
+
+class SharedCacheBackendsTest(TestCase):
+    def versions_follow_invalidation(self):
+        cache.clear()
+        version = feed_version('index', 'group:1')
+        self.assertEqual(feed_version('index', 'group:1'), version)
+        invalidate('group:1')
+        self.assertNotEqual(feed_version('index', 'group:1'), version)
+
+    def test_file_backend(self):
+        """Feed versions work on the file-based cache."""
+        location = tempfile.mkdtemp()
+        config = dict(settings.CACHE_BACKENDS['file'], LOCATION=location)
+        with override_settings(CACHES={'default': config}):
+            self.versions_follow_invalidation()
+        shutil.rmtree(location, ignore_errors=True)
+
+    def test_db_backend(self):
+        """Feed versions work on the database cache."""
+        config = settings.CACHE_BACKENDS['db']
+        with override_settings(CACHES={'default': config}):
+            call_command('createcachetable')
+            self.versions_follow_invalidation()
+
+
+class AnonymousPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post = Post.objects.create(
+            text=const.POST_TEXT, author=self.user)
+
+    def test_anonymous_page_cached(self):
+        """Repeated anonymous request runs no queries."""
+        for url in (const.INDEX_URL, const.PROFILE_USER_URL,
+                    const.ABOUT_URL):
+            with self.subTest(url=url):
+                response = self.guest_client.get(url)
+                with self.assertNumQueries(0):
+                    response2 = self.guest_client.get(url)
+                self.assertEqual(response.content, response2.content)
+                self.assertEqual(response['ETag'], response2['ETag'])
+
+    def test_conditional_get(self):
+        """Conditional request for unchanged content gets 304."""
+        cache.set(MODIFIED_KEY, time.time() - 10, None)
+        response = self.guest_client.get(const.INDEX_URL)
+        self.assertIn('Last-Modified', response)
+        response2 = self.guest_client.get(
+            const.INDEX_URL, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response2.status_code, 304)
+        response3 = self.guest_client.get(
+            const.INDEX_URL,
+            HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response3.status_code, 304)
+
+    def test_no_last_modified_within_second_of_change(self):
+        """A later change in the same second must not match the date."""
+        modified = 1_600_000_000.25
+        cache.set(MODIFIED_KEY, modified, None)
+        with mock.patch('yatube.middleware.time.time',
+                        return_value=modified + 0.5):
+            response = self.guest_client.get(
+                const.INDEX_URL,
+                HTTP_IF_MODIFIED_SINCE=http_date(modified))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('ETag', response)
+
+    def test_change_invalidates_page(self):
+        """New comment changes ETag and content."""
+        response = self.guest_client.get(const.INDEX_URL)
+        Comment.objects.create(
+            text=const.COMMENT_TEXT, author=self.user, post=self.post)
+        response2 = self.guest_client.get(
+            const.INDEX_URL, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response2.status_code, 200)
+        self.assertNotEqual(response['ETag'], response2['ETag'])
+        self.assertContains(response2, 'Комментариев: 1')
+
+    def test_authenticated_bypass(self):
+        """Authenticated users always get a freshly rendered page."""
+        self.authorized_client.get(const.INDEX_URL)
+        response = self.authorized_client.get(const.INDEX_URL)
+        self.assertIsNotNone(response.context)
+        self.assertNotIn('ETag', response)
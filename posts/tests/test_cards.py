@@ -0,0 +1,62 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.cards import card_key
+from posts.models import Comment, Group, Post
+from posts.tests import const
+
+User = get_user_model()
+
+
+class PostCardsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.author = User.objects.create_user(username=const.AUTHOR_NAME)
+        self.group = Group.objects.create(
+            title=const.GROUP_NAME,
+            slug=const.SLUG,
+            description=const.DESCRIPTION)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.post = Post.objects.create(text=const.POST_TEXT,
+                                        author=self.author,
+                                        group=self.group)
+        self.edit_url = reverse('post_edit', kwargs={
+            'username': const.AUTHOR_NAME, 'post_id': self.post.id})
+
+    def feed_post(self):
+        return Post.objects.feed().get(pk=self.post.pk)
+
+    def test_card_shared_by_feeds(self):
+        """A card rendered for one feed is reused by the others."""
+        self.authorized_client.get(const.INDEX_URL)
+        cache.set(card_key(self.feed_post()), '<p>cached card</p>')
+        for url in (const.GROUP_URL, const.PROFILE_AUTHOR_URL,
+                    reverse('post', kwargs={'username': const.AUTHOR_NAME,
+                                            'post_id': self.post.id})):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertContains(response, '<p>cached card</p>')
+
+    def test_edit_button_per_viewer(self):
+        """Cached cards get the edit button for the author only."""
+        response = self.authorized_client.get(const.INDEX_URL)
+        self.assertNotContains(response, self.edit_url)
+        response = self.author_client.get(const.INDEX_URL)
+        self.assertContains(response, self.edit_url)
+
+    def test_key_follows_content(self):
+        """Changes shown on the card lead to a new cache key."""
+        key = card_key(self.feed_post())
+        self.assertEqual(card_key(self.feed_post()), key)
+        Comment.objects.create(text=const.COMMENT_TEXT, author=self.user,
+                               post=self.post)
+        self.assertNotEqual(card_key(self.feed_post()), key)
+        key = card_key(self.feed_post())
+        Group.objects.update(title=const.GROUP_NAME2)
+        self.assertNotEqual(card_key(self.feed_post()), key)
@@ -0,0 +1,73 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from posts.tests import const
+
+User = get_user_model()
+
+
+@override_settings(COMMENTS_PER_PAGE=3)
+class PostCommentsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.author = User.objects.create_user(username=const.AUTHOR_NAME)
+        self.post = Post.objects.create(text=const.POST_TEXT,
+                                        author=self.author)
+        self.post_url = reverse('post', kwargs={
+            'username': const.AUTHOR_NAME, 'post_id': self.post.id})
+        self.comments_url = reverse('post_comments', kwargs={
+            'username': const.AUTHOR_NAME, 'post_id': self.post.id})
+
+    def add_comments(self, count):
+        for n in range(count):
+            author, _ = User.objects.get_or_create(username=f'commenter{n}')
+            Comment.objects.create(text=f'comment {n}', author=author,
+                                   post=self.post)
+
+    def shown(self, response):
+        return [item.text for item in response.context['comments_page']]
+
+    def test_first_slice_newest_first(self):
+        self.add_comments(5)
+        response = self.guest_client.get(self.post_url)
+        self.assertEqual(self.shown(response),
+                         ['comment 4', 'comment 3', 'comment 2'])
+        self.assertContains(response, 'js-more-comments')
+
+    def test_query_count_does_not_depend_on_comments(self):
+        """Comment authors are joined in the query of the slice."""
+        counts = []
+        for count in (1, 3):
+            self.add_comments(count)
+            cache.clear()
+            with CaptureQueriesContext(connection) as context:
+                self.guest_client.get(self.post_url)
+            counts.append(len(context))
+            Comment.objects.all().delete()
+        self.assertEqual(counts[0], counts[1])
+
+    def test_load_more(self):
+        """The fragment endpoint continues where the page stopped."""
+        self.add_comments(5)
+        response = self.guest_client.get(self.post_url)
+        fragment = re.search(r'data-fragment="([^"]+)"',
+                             response.content.decode()).group(1)
+        self.assertTrue(fragment.startswith(self.comments_url))
+        response = self.guest_client.get(fragment.replace('&amp;', '&'))
+        self.assertTemplateUsed(response, 'includes/comment_list.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(self.shown(response), ['comment 1', 'comment 0'])
+        self.assertNotContains(response, 'js-more-comments')
+
+    def test_wrong_author(self):
+        url = reverse('post_comments', kwargs={
+            'username': const.USER_NAME, 'post_id': self.post.id})
+        self.assertEqual(self.guest_client.get(url).status_code, 404)
@@ -0,0 +1,105 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+
+from posts.models import Comment, Group, Post
+from posts.tests import const
+
+User = get_user_model()
+
+
+class ExportTest(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.author = User.objects.create_user(username=const.AUTHOR_NAME)
+        self.group = Group.objects.create(
+            title=const.GROUP_NAME,
+            slug=const.SLUG,
+            description=const.DESCRIPTION)
+        self.posts = [
+            Post.objects.create(text=const.POST_TEXT, author=self.user,
+                                group=self.group),
+            Post.objects.create(text=const.POST_TEXT2, author=self.author),
+            Post.objects.create(text=const.POST_TEXT, author=self.user),
+        ]
+        self.comment = Comment.objects.create(
+            text=const.COMMENT_TEXT, author=self.author, post=self.posts[0])
+
+    def records(self, url, params=None):
+        response = self.guest_client.get(url, params)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'],
+                         'application/x-ndjson; charset=utf-8')
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_posts_streamed_in_id_order(self):
+        records = self.records(const.API_POSTS_URL)
+        self.assertEqual([record['id'] for record in records],
+                         [post.id for post in self.posts])
+        self.assertEqual(records[0], {
+            'id': self.posts[0].id,
+            'author': const.USER_NAME,
+            'group': const.SLUG,
+            'pub_date': self.posts[0].pub_date.isoformat(),
+            'text': const.POST_TEXT,
+            'image': None,
+            'comments_count': 1,
+        })
+
+    def test_cursor_limit_and_filters(self):
+        """Export resumes after an id and can be narrowed down."""
+        first, second, third = self.posts
+        for params, expected in (
+                ({'after': first.id}, [second, third]),
+                ({'limit': 1}, [first]),
+                ({'after': first.id, 'limit': 1}, [second]),
+                ({'author': const.USER_NAME}, [first, third]),
+                ({'group': const.SLUG}, [first])):
+            with self.subTest(params=params):
+                records = self.records(const.API_POSTS_URL, params)
+                self.assertEqual([record['id'] for record in records],
+                                 [post.id for post in expected])
+
+    def test_comments(self):
+        records = self.records(const.API_COMMENTS_URL,
+                               {'post': self.posts[0].id})
+        self.assertEqual(records, [{
+            'id': self.comment.id,
+            'post': self.posts[0].id,
+            'author': const.AUTHOR_NAME,
+            'created': self.comment.created.isoformat(),
+            'text': const.COMMENT_TEXT,
+        }])
+        self.assertEqual(self.records(const.API_COMMENTS_URL,
+                                      {'post': self.posts[1].id}), [])
+
+    def test_json_array(self):
+        response = self.guest_client.get(const.API_POSTS_URL,
+                                         {'format': 'json'})
+        records = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(len(records), 3)
+
+    def test_bad_cursor(self):
+        for url, params in ((const.API_POSTS_URL, {'after': 'x'}),
+                            (const.API_POSTS_URL, {'limit': '-1'}),
+                            (const.API_COMMENTS_URL, {'post': 'x'})):
+            with self.subTest(url=url, params=params):
+                response = self.guest_client.get(url, params)
+                self.assertEqual(response.status_code, 400)
+
+    def test_command_matches_api(self):
+        """export_posts writes the same records as the API."""
+        for options, url in (({}, const.API_POSTS_URL),
+                             ({'comments': True}, const.API_COMMENTS_URL)):
+            with self.subTest(url=url):
+                out = StringIO()
+                call_command('export_posts', stdout=out, **options)
+                response = self.guest_client.get(url)
+                self.assertEqual(
+                    out.getvalue(),
+                    b''.join(response.streaming_content).decode())
@@ -0,0 +1,58 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.following import followed_ids
+from posts.models import Follow, Post
+from posts.tests import const
+
+User = get_user_model()
+
+
+class FollowingCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.author = User.objects.create_user(username=const.AUTHOR_NAME)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.post = Post.objects.create(text=const.POST_TEXT,
+                                        author=self.author)
+        self.post_url = reverse('post', kwargs={
+            'username': const.AUTHOR_NAME, 'post_id': self.post.id})
+
+    def follow_queries(self, url):
+        with CaptureQueriesContext(connection) as context:
+            response = self.authorized_client.get(url)
+        return response, [query['sql'] for query in context
+                          if Follow._meta.db_table in query['sql']]
+
+    def test_follow_state_read_once(self):
+        """Follow buttons cost no queries once the set is cached."""
+        Follow.objects.create(user=self.user, author=self.author)
+        response, queries = self.follow_queries(const.PROFILE_AUTHOR_URL)
+        self.assertEqual(len(queries), 1)
+        self.assertContains(response, const.UNFOLLOW_URL)
+        for url in (const.PROFILE_AUTHOR_URL, self.post_url):
+            with self.subTest(url=url):
+                response, queries = self.follow_queries(url)
+                self.assertEqual(queries, [])
+                self.assertContains(response, const.UNFOLLOW_URL)
+
+    def test_follow_and_unfollow_invalidate(self):
+        """Buttons switch right after following and unfollowing."""
+        response = self.authorized_client.get(const.PROFILE_AUTHOR_URL)
+        self.assertContains(response, const.FOLLOW_URL)
+        response = self.authorized_client.get(const.FOLLOW_URL, follow=True)
+        self.assertContains(response, const.UNFOLLOW_URL)
+        response = self.authorized_client.get(const.UNFOLLOW_URL,
+                                              follow=True)
+        self.assertContains(response, const.FOLLOW_URL)
+        self.assertNotContains(response, const.UNFOLLOW_URL)
+
+    def test_anonymous(self):
+        self.assertEqual(followed_ids(AnonymousUser()), frozenset())
@@ -0,0 +1,114 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Group, GroupAuthor, GroupStats, Post
+from posts.tests import const
+
+User = get_user_model()
+
+
+class GroupStatsTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.author = User.objects.create_user(username=const.AUTHOR_NAME)
+        self.group = Group.objects.create(title=const.GROUP_NAME,
+                                          slug=const.SLUG,
+                                          description=const.DESCRIPTION)
+        self.group2 = Group.objects.create(title=const.GROUP_NAME2,
+                                           slug=const.SLUG2,
+                                           description=const.DESCRIPTION)
+
+    def add_post(self, author, group):
+        return Post.objects.create(text=const.POST_TEXT, author=author,
+                                   group=group)
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_new_group_has_empty_stats(self):
+        stats = self.stats(self.group)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertIsNone(stats.last_post)
+        self.assertEqual(stats.top_authors_list, [])
+
+    def test_new_posts_counted(self):
+        self.add_post(self.user, self.group)
+        self.add_post(self.author, self.group)
+        last = self.add_post(self.author, self.group)
+        stats = self.stats(self.group)
+        self.assertEqual(stats.posts_count, 3)
+        self.assertEqual(stats.last_post, last.pub_date)
+        self.assertEqual(stats.top_authors_list,
+                         [[const.AUTHOR_NAME, 2], [const.USER_NAME, 1]])
+        self.assertEqual(self.stats(self.group2).posts_count, 0)
+
+    def test_moved_post_counted_in_new_group(self):
+        first = self.add_post(self.author, self.group)
+        moved = self.add_post(self.user, self.group)
+        moved.group = self.group2
+        moved.save()
+        stats = self.stats(self.group)
+        self.assertEqual(stats.posts_count, 1)
+        self.assertEqual(stats.last_post, first.pub_date)
+        self.assertEqual(stats.top_authors_list, [[const.AUTHOR_NAME, 1]])
+        stats2 = self.stats(self.group2)
+        self.assertEqual(stats2.posts_count, 1)
+        self.assertEqual(stats2.top_authors_list, [[const.USER_NAME, 1]])
+
+    def test_deleted_post_uncounted(self):
+        post = self.add_post(self.author, self.group)
+        post.delete()
+        stats = self.stats(self.group)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertIsNone(stats.last_post)
+        self.assertEqual(stats.top_authors_list, [])
+        self.assertFalse(GroupAuthor.objects.exists())
+
+    def test_deleted_group_drops_stats(self):
+        post = self.add_post(self.author, self.group)
+        self.group.delete()
+        post.refresh_from_db()
+        self.assertIsNone(post.group)
+        self.assertFalse(GroupStats.objects.filter(
+            group_id=self.group.id).exists())
+        self.assertFalse(GroupAuthor.objects.exists())
+
+    def test_rebuild_matches_incremental(self):
+        for author in (self.user, self.author, self.author):
+            self.add_post(author, self.group)
+        self.add_post(self.user, self.group2).delete()
+        expected = list(GroupStats.objects.order_by('pk').values())
+        GroupStats.objects.update(posts_count=0, top_authors='[]')
+        call_command('rebuild_group_stats', stdout=StringIO())
+        self.assertEqual(list(GroupStats.objects.order_by('pk').values()),
+                         expected)
+
+    def test_directory_lists_stats(self):
+        self.add_post(self.author, self.group)
+        response = Client().get(const.GROUPS_URL)
+        self.assertEqual(
+            [group.stats.posts_count for group in response.context['page']],
+            [1, 0])
+        self.assertContains(response, const.GROUP_URL)
+        self.assertContains(response, const.GROUP2_URL)
+
+    def count_queries(self):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = Client().get(const.GROUPS_URL)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_directory_query_count_does_not_depend_on_groups(self):
+        single = self.count_queries()
+        for number in range(10):
+            group = Group.objects.create(title=f'group {number}',
+                                         slug=f'group-{number}')
+            self.add_post(self.author, group)
+        self.assertEqual(self.count_queries(), single)
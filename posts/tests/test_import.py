@@ -0,0 +1,176 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from posts import search
+from posts.models import (AuthorStats, Comment, Follow, Group, Post,
+                          TimelineEntry)
+from posts.tests import const
+
+User = get_user_model()
+
+PUB_DATE = '2020-05-01T10:00:00.123456+00:00'
+
+
+class ImportContentTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.author = User.objects.create_user(username=const.AUTHOR_NAME)
+        self.group = Group.objects.create(
+            title=const.GROUP_NAME,
+            slug=const.SLUG,
+            description=const.DESCRIPTION)
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def ndjson(self, name, records):
+        return self.write(name, ''.join(
+            json.dumps(record, ensure_ascii=False) + '\n'
+            for record in records))
+
+    def import_content(self, *args, **options):
+        out = StringIO()
+        call_command('import_content', *args, stdout=out, **options)
+        return out.getvalue()
+
+    def test_posts_and_comments(self):
+        """Records keep their ids and dates, derived tables are rebuilt."""
+        posts = self.ndjson('posts.ndjson', [
+            {'id': 10, 'author': const.AUTHOR_NAME, 'group': const.SLUG,
+             'pub_date': PUB_DATE, 'text': const.POST_TEXT},
+            {'id': 11, 'author': const.USER_NAME, 'group': None,
+             'pub_date': PUB_DATE, 'text': const.POST_TEXT2},
+        ])
+        comments = self.ndjson('comments.ndjson', [
+            {'id': 5, 'post': 10, 'author': const.USER_NAME,
+             'created': PUB_DATE, 'text': 'кошки'},
+        ])
+        self.import_content('posts', posts)
+        self.import_content('comments', comments)
+        post = Post.objects.get(pk=10)
+        self.assertEqual(post.author, self.author)
+        self.assertEqual(post.group, self.group)
+        self.assertEqual(post.pub_date.isoformat(), PUB_DATE)
+        comment = Comment.objects.get(pk=5)
+        self.assertEqual((comment.post_id, comment.author), (10, self.user))
+        self.assertEqual(AuthorStats.objects.get(
+            user=self.author).posts_count, 1)
+        self.assertEqual(search.search('кошка'), [10])
+        new = Post.objects.create(text=const.POST_TEXT, author=self.user)
+        self.assertGreater(new.pk, 11)
+
+    def test_export_round_trip(self):
+        """Output of export_posts imports into the same records."""
+        Post.objects.create(text=const.POST_TEXT, author=self.author,
+                            group=self.group)
+        exported = StringIO()
+        call_command('export_posts', stdout=exported)
+        path = self.write('posts.ndjson', exported.getvalue())
+        Post.objects.all().delete()
+        self.import_content('posts', path)
+        again = StringIO()
+        call_command('export_posts', stdout=again)
+        self.assertEqual(again.getvalue(), exported.getvalue())
+
+    def test_follows_from_csv(self):
+        """Duplicates and self follows are skipped, counters rebuilt."""
+        path = self.write('follows.csv', '\n'.join((
+            'user,author',
+            f'{const.USER_NAME},{const.AUTHOR_NAME}',
+            f'{const.USER_NAME},{const.AUTHOR_NAME}',
+            f'{const.USER_NAME},{const.USER_NAME}',
+            '')))
+        out = self.import_content('follows', path)
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertIn('Skipped 1: already present', out)
+        self.assertIn('Skipped 1: follow of oneself', out)
+        self.assertEqual(AuthorStats.objects.get(
+            user=self.author).followers_count, 1)
+
+    def test_unknown_references(self):
+        """Records of unknown rows are skipped unless users are created."""
+        path = self.ndjson('posts.ndjson', [
+            {'id': 1, 'author': 'newcomer', 'text': const.POST_TEXT},
+            {'id': 2, 'author': const.AUTHOR_NAME, 'group': 'missing',
+             'text': const.POST_TEXT},
+            {'id': 3, 'author': const.AUTHOR_NAME, 'text': const.POST_TEXT,
+             'pub_date': 'yesterday'},
+            {'author': const.AUTHOR_NAME, 'text': const.POST_TEXT},
+        ])
+        out = self.import_content('posts', path)
+        self.assertEqual(Post.objects.count(), 0)
+        for reason in ('unknown author', 'unknown group', 'invalid record',
+                       'missing id'):
+            self.assertIn(f'Skipped 1: {reason}', out)
+        self.import_content('posts', path, create_users=True)
+        self.assertEqual(Post.objects.get().author.username, 'newcomer')
+        self.assertFalse(User.objects.get(
+            username='newcomer').has_usable_password())
+
+    def test_resume_from_checkpoint(self):
+        """Committed records are not read again, the checkpoint is removed."""
+        path = self.ndjson('posts.ndjson', [
+            {'id': n, 'author': const.AUTHOR_NAME, 'text': f'post {n}'}
+            for n in range(1, 6)])
+        checkpoint = f'{path}.checkpoint'
+        self.write(checkpoint, json.dumps({'kind': 'posts', 'done': 3}))
+        out = self.import_content('posts', path, batch_size=1)
+        self.assertIn('Resuming after 3 records.', out)
+        self.assertEqual(set(Post.objects.values_list('pk', flat=True)),
+                         {4, 5})
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_present_rows_and_conflicts(self):
+        """Rows imported before are skipped, other rows of an id reported."""
+        records = [{'id': n, 'author': const.AUTHOR_NAME,
+                    'pub_date': PUB_DATE, 'text': f'post {n}'}
+                   for n in (1, 2)]
+        path = self.ndjson('posts.ndjson', records)
+        self.import_content('posts', path)
+        out = self.import_content('posts', path)
+        self.assertIn('Skipped 2: already present', out)
+        records.append({'id': 3, 'author': const.AUTHOR_NAME,
+                        'pub_date': PUB_DATE, 'text': 'post 3'})
+        records[0]['author'] = const.USER_NAME
+        path = self.ndjson('posts.ndjson', records)
+        with self.assertRaisesMessage(CommandError, 'conflict'):
+            self.import_content('posts', path)
+        self.assertEqual(Post.objects.get(pk=1).author, self.author)
+        self.assertTrue(Post.objects.filter(pk=3).exists())
+
+    def test_created_users_get_stats(self):
+        """Users created by a comments import count their later posts."""
+        Post.objects.create(id=10, text=const.POST_TEXT, author=self.author)
+        path = self.ndjson('comments.ndjson', [
+            {'id': 1, 'post': 10, 'author': 'newcomer', 'text': 'кошки'}])
+        self.import_content('comments', path, create_users=True)
+        newcomer = User.objects.get(username='newcomer')
+        Post.objects.create(text=const.POST_TEXT, author=newcomer)
+        self.assertEqual(AuthorStats.objects.get(
+            user=newcomer).posts_count, 1)
+
+    def test_derived_tables_of_imported_rows(self):
+        """Only rows of the imported records are indexed and delivered."""
+        Follow.objects.create(user=self.user, author=self.author)
+        old = Post.objects.create(text=const.POST_TEXT, author=self.author)
+        Post.objects.filter(pk=old.pk).update(score=0)
+        path = self.ndjson('posts.ndjson', [
+            {'id': 10, 'author': const.AUTHOR_NAME, 'text': 'кошки'}])
+        self.import_content('posts', path)
+        self.assertEqual(Post.objects.get(pk=old.pk).score, 0)
+        self.assertGreater(Post.objects.get(pk=10).score, 0)
+        self.assertEqual(search.search('кошка'), [10])
+        self.assertEqual(set(TimelineEntry.objects.filter(
+            user=self.user).values_list('post_id', flat=True)), {old.pk, 10})
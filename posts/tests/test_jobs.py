@@ -0,0 +1,118 @@
+import datetime as dt
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from posts.jobs import claim, enqueue, work
+from posts.models import Job, Post
+from posts.tests import const
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+CALLS = []
+
+
+def record(value):
+    CALLS.append(value)
+
+
+def explode():
+    raise RuntimeError('boom')
+
+
+class JobQueueTest(TestCase):
+    def setUp(self):
+        CALLS.clear()
+
+    def test_enqueue_and_work(self):
+        """Queued job runs in a worker and leaves the queue."""
+        enqueue(record, 1)
+        self.assertEqual(CALLS, [])
+        self.assertEqual(work(), 1)
+        self.assertEqual(CALLS, [1])
+        self.assertFalse(Job.objects.exists())
+
+    def test_delayed_job_waits(self):
+        """Job is not run before its time."""
+        enqueue(record, 1, delay=60)
+        self.assertEqual(work(), 0)
+        self.assertEqual(CALLS, [])
+
+    @override_settings(JOBS_MAX_ATTEMPTS=2)
+    def test_retry_then_fail(self):
+        """Failing job is retried with backoff and finally marked failed."""
+        job = enqueue(explode)
+        work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.PENDING)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('boom', job.last_error)
+        Job.objects.update(run_at=timezone.now())
+        work()
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.attempts, 2)
+
+    def test_expired_lease_reclaimed(self):
+        """Job of a crashed worker runs again once its lease expires."""
+        job = enqueue(record, 3)
+        self.assertEqual(claim(), job)
+        self.assertEqual(work(), 0)
+        Job.objects.update(claimed_at=timezone.now() - dt.timedelta(
+            seconds=settings.JOBS_LEASE_SECONDS + 1))
+        self.assertEqual(work(), 1)
+        self.assertEqual(CALLS, [3])
+
+    @override_settings(JOBS_MAX_ATTEMPTS=1)
+    def test_expired_lease_of_last_attempt_fails(self):
+        job = enqueue(record, 3)
+        claim()
+        Job.objects.update(claimed_at=timezone.now() - dt.timedelta(
+            seconds=settings.JOBS_LEASE_SECONDS + 1))
+        self.assertEqual(work(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    @override_settings(JOBS_EAGER=True)
+    def test_eager_mode(self):
+        """Eager mode calls the function at once."""
+        enqueue(record, 2)
+        self.assertEqual(CALLS, [2])
+        self.assertFalse(Job.objects.exists())
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class PostJobsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_new_post_queues_thumbnails(self):
+        """New post with image leaves thumbnails to a worker."""
+        self.authorized_client.post(const.NEW_POST_URL, data={
+            'text': const.POST_TEXT,
+            'image': SimpleUploadedFile(
+                name='small.gif',
+                content=const.PICT,
+                content_type='image/gif')})
+        post = Post.objects.get()
+        self.assertEqual(post.thumbnails, '')
+        self.assertIn('posts.thumbnails.render_thumbnails',
+                      Job.objects.values_list('task', flat=True))
+        work()
+        post.refresh_from_db()
+        self.assertEqual(
+            list(post.thumbnail_urls), list(settings.THUMBNAIL_SIZES))
@@ -0,0 +1,61 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from posts.tests import const
+
+User = get_user_model()
+
+TEXT = '<b>жирный</b>\nвторая строка'
+HTML = '&lt;b&gt;жирный&lt;/b&gt;<br>вторая строка'
+
+
+class RenderedTextTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username=const.AUTHOR_NAME)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+        self.post = Post.objects.create(text=TEXT, author=self.author)
+        self.comment = Comment.objects.create(text=TEXT, author=self.author,
+                                              post=self.post)
+        self.post_url = reverse('post', kwargs={
+            'username': const.AUTHOR_NAME, 'post_id': self.post.id})
+
+    def test_rendered_on_save(self):
+        for obj in (self.post, self.comment):
+            with self.subTest(model=type(obj).__name__):
+                obj.refresh_from_db()
+                self.assertEqual(obj.text_html, HTML)
+
+    def test_pages_print_stored_html(self):
+        Post.objects.update(text_html='<p>stored post</p>')
+        Comment.objects.update(text_html='<p>stored comment</p>')
+        response = self.authorized_client.get(self.post_url)
+        self.assertContains(response, '<p>stored post</p>')
+        self.assertContains(response, '<p>stored comment</p>')
+
+    def test_missing_html_rendered_on_the_fly(self):
+        Post.objects.update(text_html='')
+        response = self.authorized_client.get(self.post_url)
+        self.assertContains(response, HTML, count=2)
+
+    def test_regenerated_on_edit(self):
+        url = reverse('post_edit', kwargs={
+            'username': const.AUTHOR_NAME, 'post_id': self.post.id})
+        self.authorized_client.post(url, {'text': 'a & b'})
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, 'a &amp; b')
+
+    def test_rerender_command(self):
+        """Stale HTML is replaced, up to date rows are left alone."""
+        Post.objects.update(text_html='stale')
+        out = StringIO()
+        call_command('rerender_text', batch_size=1, stdout=out)
+        self.assertIn('Updated 1 of 1', out.getvalue())
+        self.assertIn('Updated 0 of 1', out.getvalue())
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.text_html, HTML)
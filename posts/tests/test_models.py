@@ -1,6 +1,9 @@
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import TestCase
 
-from posts.models import Comment, Follow, Group, Post, User
+from posts.models import AuthorStats, Comment, Follow, Group, Post, User
 from posts.tests import const
 
 
@@ -117,3 +120,53 @@ class FollowModelTest(TestCase):
         self.assertEquals(
             expected_object_name,
             f'subscribe: {const.USER_NAME} for {const.AUTHOR_NAME}')
+
+
+class AuthorStatsModelTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.author = User.objects.create_user(username=const.AUTHOR_NAME)
+
+    def assertStats(self, user, followers, following, posts):
+        stats = AuthorStats.objects.get(user=user)
+        self.assertEqual(
+            (stats.followers_count, stats.following_count,
+             stats.posts_count),
+            (followers, following, posts))
+
+    def test_stats_created_with_user(self):
+        """New user gets zero counters."""
+        self.assertStats(self.user, 0, 0, 0)
+
+    def test_posts_counter(self):
+        """Posts counter follows post creation and deletion."""
+        post = Post.objects.create(text=const.POST_TEXT, author=self.author)
+        self.assertStats(self.author, 0, 0, 1)
+        post.delete()
+        self.assertStats(self.author, 0, 0, 0)
+
+    def test_follow_counters(self):
+        """Follow counters follow subscription and unsubscription."""
+        follow = Follow.objects.create(user=self.user, author=self.author)
+        self.assertStats(self.user, 0, 1, 0)
+        self.assertStats(self.author, 1, 0, 0)
+        follow.delete()
+        self.assertStats(self.user, 0, 0, 0)
+        self.assertStats(self.author, 0, 0, 0)
+
+    def test_missing_stats_recounted(self):
+        """Counters of a user without a stats row start from a recount."""
+        Post.objects.create(text=const.POST_TEXT, author=self.author)
+        AuthorStats.objects.filter(user=self.author).delete()
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertStats(self.author, 1, 0, 1)
+
+    def test_rebuild_command(self):
+        """rebuild_author_stats restores counters from scratch."""
+        Post.objects.create(text=const.POST_TEXT, author=self.author)
+        Follow.objects.create(user=self.user, author=self.author)
+        AuthorStats.objects.update(
+            followers_count=0, following_count=0, posts_count=0)
+        call_command('rebuild_author_stats', stdout=StringIO())
+        self.assertStats(self.user, 0, 1, 0)
+        self.assertStats(self.author, 1, 0, 1)
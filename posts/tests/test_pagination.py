@@ -0,0 +1,60 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from posts.models import Post
+from posts.pagination import CursorPaginator
+from posts.tests import const
+
+User = get_user_model()
+
+PER_PAGE = 3
+
+
+class CursorPaginatorTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        Post.objects.bulk_create(
+            Post(text=const.POST_TEXT, author=self.user) for _ in range(8))
+        # equal dates check that the id tie-breaker keeps pages apart
+        Post.objects.update(pub_date=Post.objects.first().pub_date)
+        self.expected = list(Post.objects.order_by('-pub_date', '-id'))
+
+    def paginator(self):
+        return CursorPaginator(Post.objects.all(), PER_PAGE)
+
+    def test_walk_forward_and_back(self):
+        """Cursors walk all posts forward and back without gaps."""
+        seen = []
+        pages = []
+        cursor = None
+        while True:
+            paginator = self.paginator()
+            page = paginator.get_page(cursor)
+            seen.extend(page)
+            pages.append(list(page))
+            if not page.has_next():
+                break
+            cursor = paginator.next_cursor
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 3)
+        back = self.paginator().get_page(paginator.previous_cursor)
+        self.assertEqual(list(back), pages[1])
+        self.assertTrue(back.has_previous())
+        self.assertTrue(back.has_next())
+
+    def test_first_page(self):
+        """First page has no previous page and skips COUNT(*)."""
+        paginator = self.paginator()
+        with self.assertNumQueries(1):
+            page = paginator.get_page(None)
+        self.assertEqual(list(page), self.expected[:PER_PAGE])
+        self.assertFalse(page.has_previous())
+        self.assertTrue(page.has_next())
+        self.assertIsNone(paginator.previous_cursor)
+
+    def test_broken_cursor(self):
+        """Broken cursor falls back to the first page."""
+        for cursor in ('garbage', 'W10', 'WyJhIiwgImIiXQ'):
+            with self.subTest(cursor=cursor):
+                page = self.paginator().get_page(cursor)
+                self.assertEqual(list(page), self.expected[:PER_PAGE])
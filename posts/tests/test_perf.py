@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+
+from posts.models import Post
+from posts.tests import const
+from yatube import perf
+
+User = get_user_model()
+
+
+@override_settings(PERF_RECORD=True, PERF_SAMPLE_RATE=1.0)
+class PerformanceRecordTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.staff = User.objects.create_user(
+            username=const.AUTHOR_NAME, is_staff=True)
+        self.staff_client = Client()
+        self.staff_client.force_login(self.staff)
+        Post.objects.create(text=const.POST_TEXT, author=self.user)
+
+    def test_request_recorded(self):
+        """Each request leaves a record with its costs."""
+        self.guest_client.get(const.INDEX_URL)
+        self.guest_client.get(const.INDEX_URL)
+        first, second = perf.recent()
+        self.assertEqual(first['view'], 'index')
+        self.assertEqual(first['status'], 200)
+        self.assertGreater(first['db_queries'], 0)
+        self.assertGreater(first['template_ms'], 0)
+        self.assertGreater(first['cache_misses'], 0)
+        # the second one is served from the anonymous page cache
+        self.assertEqual(second['db_queries'], 0)
+        self.assertGreater(second['cache_hits'], 0)
+        self.assertGreaterEqual(second['total_ms'], 0)
+
+    @override_settings(PERF_BUFFER_SIZE=3)
+    def test_ring_buffer_keeps_latest(self):
+        """Old records are overwritten."""
+        for url in (const.INDEX_URL, const.ABOUT_URL, const.ABOUT_TECH_URL,
+                    const.PROFILE_USER_URL):
+            self.guest_client.get(url)
+        self.assertEqual([record['path'] for record in perf.recent()],
+                         [const.ABOUT_URL, const.ABOUT_TECH_URL,
+                          const.PROFILE_USER_URL])
+
+    @override_settings(PERF_SAMPLE_RATE=0)
+    def test_sampling(self):
+        self.guest_client.get(const.INDEX_URL)
+        self.assertEqual(perf.recent(), [])
+
+    def test_json_endpoint_staff_only(self):
+        """Summary is served to staff only."""
+        self.guest_client.get(const.INDEX_URL)
+        response = self.guest_client.get(const.PERF_STATS_URL)
+        self.assertEqual(response.status_code, 302)
+        response = self.staff_client.get(const.PERF_STATS_URL)
+        data = response.json()
+        self.assertEqual(data['views']['index']['requests'], 1)
+        self.assertEqual(data['recent'][0]['path'], const.INDEX_URL)
+
+    def test_perfstats_command(self):
+        self.guest_client.get(const.INDEX_URL)
+        out = StringIO()
+        call_command('perfstats', stdout=out)
+        self.assertIn('\nindex ', out.getvalue())
@@ -0,0 +1,98 @@
+from io import StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+from posts.signals import tune_sqlite
+from posts.tests import const
+
+User = get_user_model()
+
+
+class FeedQueriesTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.author = User.objects.create_user(username=const.AUTHOR_NAME)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        Follow.objects.create(user=self.user, author=self.author)
+        self.group = Group.objects.create(
+            title=const.GROUP_NAME,
+            slug=const.SLUG,
+            description=const.DESCRIPTION
+        )
+        self.post = self.add_post()
+        self.urls = (
+            const.INDEX_URL,
+            const.GROUP_URL,
+            const.PROFILE_AUTHOR_URL,
+            const.FOLLOW_INDEX_URL,
+            reverse('post', kwargs={'username': const.AUTHOR_NAME,
+                                    'post_id': self.post.id}),
+        )
+
+    def add_post(self):
+        post = Post.objects.create(
+            text=const.POST_TEXT,
+            author=self.author,
+            group=self.group
+        )
+        Comment.objects.create(
+            text=const.COMMENT_TEXT,
+            author=self.user,
+            post=post
+        )
+        return post
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(context)
+
+    def test_feed_query_count_does_not_depend_on_posts(self):
+        """Feed page costs the same number of queries for any page size."""
+        single = {url: self.count_queries(url) for url in self.urls}
+        for _ in range(settings.PAGINATION_PER_PAGE):
+            self.add_post()
+        for url in self.urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), single[url])
+
+    def test_feed_posts_annotated(self):
+        """Feed posts carry author, group and comments count."""
+        post = Post.objects.feed().get(pk=self.post.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(post.author, self.author)
+            self.assertEqual(post.group, self.group)
+            self.assertEqual(post.comments_count, 1)
+
+
+class FeedIndexesTest(TestCase):
+    def test_feeds_use_indexes(self):
+        """No feed query needs a full scan or a temporary B-tree sort."""
+        out = StringIO()
+        call_command('explain_feeds', stdout=out)
+        self.assertIn('All feeds use indexes.', out.getvalue())
+
+
+class SQLiteProfileTest(TestCase):
+    @override_settings(SQLITE_PRAGMAS={'cache_size': -1234,
+                                       'busy_timeout': 4321})
+    def test_pragmas_applied(self):
+        """Configured pragmas are set on new connections."""
+        tune_sqlite(sender=None, connection=connection)
+        with connection.cursor() as cursor:
+            for pragma, value in (('cache_size', -1234),
+                                  ('busy_timeout', 4321)):
+                cursor.execute(f'PRAGMA {pragma}')
+                self.assertEqual(cursor.fetchone()[0], value)
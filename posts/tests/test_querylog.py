@@ -0,0 +1,74 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.template import Context, Template
+from django.template.base import Origin
+from django.test import Client, RequestFactory, TestCase, override_settings
+
+from posts.models import Comment, Follow, Group, Post
+from posts.tests import const
+from yatube.querylog import DuplicateQueriesError, QueryLog, fingerprint
+
+User = get_user_model()
+
+
+class QueryLogTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.group = Group.objects.create(
+            title=const.GROUP_NAME,
+            slug=const.SLUG,
+            description=const.DESCRIPTION)
+        for number in range(5):
+            author = User.objects.create_user(username=f'author{number}')
+            Follow.objects.create(user=self.user, author=author)
+            post = Post.objects.create(
+                text=const.POST_TEXT, author=author, group=self.group)
+            Comment.objects.create(
+                text=const.COMMENT_TEXT, author=author, post=post)
+        Post.objects.create(text=const.POST_TEXT, author=self.user)
+
+    def test_fingerprint(self):
+        """Statements differing in values share a fingerprint."""
+        self.assertEqual(
+            fingerprint("SELECT * FROM t WHERE id IN (%s, %s, %s)\n"
+                        "AND name = 'it''s' LIMIT 21"),
+            'SELECT * FROM t WHERE id IN (...) AND name = ? LIMIT ?')
+        self.assertEqual(fingerprint('SELECT 1 FROM t2 WHERE id = %s'),
+                         fingerprint('SELECT 1 FROM t2 WHERE id = 5'))
+
+    @override_settings(QUERYLOG_DUPLICATE_LIMIT=2, QUERYLOG_RAISE=True)
+    def test_repeated_query_reported_with_template_line(self):
+        template = Template(
+            '{% for comment in comments %}\n'
+            '{{ comment.author.username }}{% endfor %}',
+            origin=Origin('card.html', template_name='card.html'))
+        log = QueryLog(RequestFactory().get(const.INDEX_URL))
+        with connection.execute_wrapper(log):
+            template.render(Context({'comments': Comment.objects.all()}))
+        with self.assertRaisesMessage(DuplicateQueriesError, 'card.html:2'):
+            log.report()
+
+    @override_settings(QUERYLOG_DUPLICATE_LIMIT=0, QUERYLOG_RAISE=True)
+    def test_single_query_over_limit_reported(self):
+        log = QueryLog(RequestFactory().get(const.INDEX_URL))
+        with connection.execute_wrapper(log):
+            Post.objects.count()
+        with self.assertRaisesMessage(DuplicateQueriesError, 'view code'):
+            log.report()
+
+    @override_settings(QUERYLOG_DUPLICATE_LIMIT=1, QUERYLOG_RAISE=True)
+    def test_feeds_run_each_query_once(self):
+        """Feed pages do not fetch anything per post."""
+        for url in (const.INDEX_URL, const.GROUP_URL, const.PROFILE_USER_URL,
+                    const.FOLLOW_INDEX_URL):
+            with self.subTest(url=url):
+                response = self.authorized_client.get(url)
+                self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERYLOG_SLOW_MS=0)
+    def test_slow_query_logged(self):
+        with self.assertLogs('yatube.queries', 'WARNING') as logs:
+            self.authorized_client.get(const.INDEX_URL)
+        self.assertTrue(any('in index' in line for line in logs.output))
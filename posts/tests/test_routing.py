@@ -0,0 +1,123 @@
+import unittest
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connections
+from django.test import (Client, RequestFactory, TestCase,
+                         TransactionTestCase, override_settings)
+from django.test.utils import CaptureQueriesContext
+
+from posts.models import Post
+from posts.tests import const
+from yatube import routers
+from yatube.middleware import ReplicaRoutingMiddleware
+
+User = get_user_model()
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRouterTest(TestCase):
+    def setUp(self):
+        self.router = routers.ReplicaRouter()
+
+    def test_reads_routed_inside_replica_reads_only(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        with routers.replica_reads():
+            self.assertEqual(self.router.db_for_read(Post), 'replica')
+            self.assertEqual(self.router.db_for_write(Post), 'default')
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+
+    def test_writes_tracked(self):
+        with routers.track_writes() as writes:
+            self.assertEqual(writes, [])
+            self.router.db_for_write(Post)
+        self.assertEqual(writes, [Post])
+
+    @override_settings(REPLICA_CACHE_TIMEOUT=5)
+    def test_replica_content_cached_briefly(self):
+        for timeout in (None, 60):
+            with self.subTest(timeout=timeout):
+                self.assertEqual(routers.cache_timeout(timeout), timeout)
+                with routers.replica_reads():
+                    self.assertEqual(routers.cache_timeout(timeout), 5)
+
+    def test_read_only_views(self):
+        """Only safe requests of listed views of unpinned clients qualify."""
+        middleware = ReplicaRoutingMiddleware(lambda request: None)
+        factory = RequestFactory()
+        pinned = factory.get(const.INDEX_URL)
+        pinned.COOKIES[routers.PIN_COOKIE] = '1'
+        for request, read_only in (
+                (factory.get(const.INDEX_URL), True),
+                (factory.get(const.PROFILE_USER_URL), True),
+                (factory.get(const.NEW_POST_URL), False),
+                (factory.post(const.INDEX_URL), False),
+                (pinned, False)):
+            with self.subTest(path=request.path, method=request.method):
+                self.assertEqual(middleware.is_read_only(request), read_only)
+
+
+@override_settings(DATABASE_REPLICAS=['default'])
+class PrimaryPinTest(TestCase):
+    def test_write_pins_client_to_primary(self):
+        """Client gets the pin cookie after a write only."""
+        user = User.objects.create_user(username=const.USER_NAME)
+        client = Client()
+        client.force_login(user)
+        response = client.get(const.INDEX_URL)
+        self.assertNotIn(routers.PIN_COOKIE, response.cookies)
+        response = client.post(const.NEW_POST_URL, {'text': const.POST_TEXT})
+        self.assertIn(routers.PIN_COOKIE, response.cookies)
+        self.assertEqual(
+            response.cookies[routers.PIN_COOKIE]['max-age'],
+            settings.REPLICA_PIN_SECONDS)
+
+
+@override_settings(DATABASE_REPLICAS=['default'], REPLICA_CACHE_TIMEOUT=0)
+class ReplicaCacheTest(TestCase):
+    def test_replica_pages_not_kept(self):
+        """Pages read from a possibly lagging replica are not reused."""
+        cache.clear()
+        user = User.objects.create_user(username=const.USER_NAME)
+        Post.objects.create(text=const.POST_TEXT, author=user)
+        client = Client()
+        for url in (const.INDEX_URL, const.PROFILE_USER_URL):
+            with self.subTest(url=url):
+                client.get(url)
+                # queryset update() skips signals, so versions stay put
+                Post.objects.update(text=const.POST_TEXT2,
+                                    text_html=const.POST_TEXT2)
+                self.assertContains(client.get(url), const.POST_TEXT2)
+                Post.objects.update(text=const.POST_TEXT,
+                                    text_html=const.POST_TEXT)
+
+
+@unittest.skipUnless('replica' in settings.DATABASES,
+                     'set YATUBE_DB_REPLICA to test with a replica')
+@override_settings(ANONYMOUS_PAGE_CACHE_VIEWS=[],
+                   DATABASE_REPLICAS=['replica'])
+class ReplicaDatabaseTest(TransactionTestCase):
+    databases = {'default', 'replica'}
+
+    def setUp(self):
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        Post.objects.create(text=const.POST_TEXT, author=self.user)
+
+    def queries(self, client, url):
+        with CaptureQueriesContext(connections['default']) as primary, \
+                CaptureQueriesContext(connections['replica']) as replica:
+            client.get(url)
+        return len(primary), len(replica)
+
+    def test_feed_read_from_replica(self):
+        primary, replica = self.queries(Client(), const.PROFILE_USER_URL)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_pinned_client_reads_primary(self):
+        client = Client()
+        client.cookies[routers.PIN_COOKIE] = '1'
+        primary, replica = self.queries(client, const.PROFILE_USER_URL)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
@@ -0,0 +1,117 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.utils import timezone
+
+from posts import search
+from posts.jobs import work
+from posts.models import Comment, Job, Post
+from posts.stemmer import stem
+from posts.tests import const
+
+User = get_user_model()
+
+
+class StemmerTest(TestCase):
+    def test_word_forms_share_stem(self):
+        """Inflected forms of a word reduce to the same stem."""
+        for forms in (('подписка', 'подписки', 'подписками'),
+                      ('красивый', 'красивая', 'красивейшие'),
+                      ('читал', 'читала', 'читать'),
+                      ('ёлка', 'елки')):
+            with self.subTest(forms=forms):
+                self.assertEqual(len({stem(form) for form in forms}), 1)
+
+
+class SearchTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.cats = Post.objects.create(
+            text='Красивые кошки спят на диване', author=self.user)
+        self.dogs = Post.objects.create(
+            text='Собака охраняет дом', author=self.user)
+        work()
+
+    def assertFound(self, query, posts):
+        self.assertEqual(search.search(query), [post.id for post in posts])
+
+    def run_reindex(self):
+        """Run queued reindex jobs without waiting for their delay."""
+        Job.objects.update(run_at=timezone.now())
+        work()
+
+    def check_index(self):
+        self.assertFound('кошками', [self.cats])
+        self.assertFound('красивая кошка', [self.cats])
+        self.assertFound('кошка собака', [])
+        self.assertFound('', [])
+
+        comment = Comment.objects.create(
+            text='У меня тоже есть кошка', author=self.user, post=self.dogs)
+        self.assertFound('кошка', [self.cats])
+        self.run_reindex()
+        self.assertFound('кошка', [self.cats, self.dogs])
+        comment.delete()
+        self.run_reindex()
+        self.assertFound('кошка', [self.cats])
+
+        self.dogs.text = 'Кошка и собака'
+        self.dogs.save()
+        self.assertFound('кошка', [self.cats])
+        self.run_reindex()
+        self.assertFound('собаки', [self.dogs])
+        self.dogs.delete()
+        self.assertFound('кошки', [self.cats])
+
+    def test_fts(self):
+        """FTS5 index follows saves and deletes of posts and comments."""
+        if not search.fts5_available():
+            self.skipTest('SQLite is built without FTS5')
+        with override_settings(SEARCH_BACKEND='fts5'):
+            self.check_index()
+
+    def test_rebuild_creates_fts_table(self):
+        """Switching to FTS5 after migrations takes only a rebuild."""
+        if not search.fts5_available():
+            self.skipTest('SQLite is built without FTS5')
+        with override_settings(SEARCH_BACKEND='fts5'):
+            with connection.cursor() as cursor:
+                cursor.execute(f'DROP TABLE IF EXISTS {search.FTS_TABLE}')
+            search.rebuild()
+            self.assertFound('кошки', [self.cats])
+
+    @override_settings(SEARCH_BACKEND='inverted')
+    def test_inverted_index(self):
+        """Fallback inverted index behaves the same way."""
+        search.rebuild()
+        self.check_index()
+
+    def test_comments_reindexed_once(self):
+        """A burst of comments on a post queues a single reindex."""
+        for _ in range(3):
+            Comment.objects.create(
+                text='Кошка', author=self.user, post=self.dogs)
+        self.assertEqual(Job.objects.count(), 1)
+        self.run_reindex()
+        self.assertEqual(set(search.search('кошка')),
+                         {self.cats.id, self.dogs.id})
+
+    def test_post_text_ranks_higher(self):
+        """Posts about the word come before posts merely commented with it."""
+        Comment.objects.create(
+            text='Собака', author=self.user, post=self.cats)
+        backends = ['inverted'] + ['fts5'] * search.fts5_available()
+        for backend in backends:
+            with self.subTest(backend=backend), \
+                    override_settings(SEARCH_BACKEND=backend):
+                search.rebuild()
+                self.assertFound('собака', [self.dogs, self.cats])
+
+    def test_search_page(self):
+        """Search page lists found posts."""
+        client = Client()
+        client.force_login(self.user)
+        response = client.get(const.SEARCH_URL, {'q': 'кошки'})
+        self.assertEqual(list(response.context['page']), [self.cats])
+        self.assertContains(response, f'post_{self.cats.id}')
+        self.assertNotContains(response, f'post_{self.dogs.id}')
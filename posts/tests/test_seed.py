@@ -0,0 +1,43 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+
+from posts.models import AuthorStats, Comment, Follow, Group, Post, User
+
+
+class SeedCommandTest(TestCase):
+    def test_seed(self):
+        """Seeded rows come with their stats and spread publication dates."""
+        call_command('seed', users=50, groups=3, posts=200, comments=300,
+                     follows=100, batch_size=40, stdout=StringIO())
+        self.assertEqual(User.objects.count(), 50)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 200)
+        self.assertEqual(Comment.objects.count(), 300)
+        follows = Follow.objects.count()
+        self.assertGreater(follows, 0)
+        self.assertEqual(
+            sum(AuthorStats.objects.values_list('followers_count', flat=True)),
+            follows)
+        self.assertGreater(
+            Post.objects.values('pub_date__date').distinct().count(), 1)
+
+    @override_settings(DEBUG_TOOLBAR=False)
+    def test_loadtest(self):
+        """Load test reports every requested view."""
+        call_command('seed', users=10, groups=2, posts=30, comments=30,
+                     follows=20, stdout=StringIO())
+        out = StringIO()
+        call_command('loadtest', requests=60, users=3, stdout=out)
+        report = out.getvalue()
+        self.assertIn('p99 ms', report)
+        for view in ('index', 'post', 'profile'):
+            self.assertIn(f'\n{view} ', report)
+        self.assertIn('CACHE_BACKEND = ', report)
+
+    @override_settings(DEBUG_TOOLBAR=True)
+    def test_loadtest_refuses_debug_toolbar(self):
+        """Timings taken with the debug toolbar are not reported."""
+        with self.assertRaisesMessage(CommandError, 'YATUBE_DEBUG_TOOLBAR'):
+            call_command('loadtest', stdout=StringIO())
@@ -0,0 +1,142 @@
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+
+from posts.models import Follow, Post, TimelineEntry
+from posts import timeline
+from posts.tests import const
+from posts.timeline import TimelinePaginator
+
+User = get_user_model()
+
+
+class TimelineTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.author = User.objects.create_user(username=const.AUTHOR_NAME)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.old_post = Post.objects.create(
+            text=const.POST_TEXT, author=self.author)
+
+    def entries(self):
+        return set(TimelineEntry.objects.filter(
+            user=self.user).values_list('post_id', flat=True))
+
+    def test_follow_backfills_and_unfollow_removes(self):
+        """Following copies old posts, unfollowing removes them."""
+        self.authorized_client.get(const.FOLLOW_URL)
+        self.assertEqual(self.entries(), {self.old_post.id})
+        self.authorized_client.get(const.UNFOLLOW_URL)
+        self.assertEqual(self.entries(), set())
+
+    def test_new_post_fanned_out(self):
+        """New post is delivered to followers only."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text=const.POST_TEXT2, author=self.author)
+        self.assertEqual(self.entries(), {self.old_post.id, post.id})
+        self.assertFalse(
+            TimelineEntry.objects.filter(user=self.author).exists())
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_timeline_trimmed(self):
+        """Backfill keeps only the latest TIMELINE_LENGTH posts."""
+        posts = [Post.objects.create(text=const.POST_TEXT2,
+                                     author=self.author) for _ in range(2)]
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(self.entries(), {post.id for post in posts})
+
+    @override_settings(TIMELINE_LENGTH=2, TIMELINE_DELIVERY_BATCH=1)
+    def test_delivery_trims_timelines(self):
+        """Fan-out keeps timelines of every follower within the limit."""
+        reader = User.objects.create_user(username=const.USER_NAME + '2')
+        for user in (self.user, reader):
+            Follow.objects.create(user=user, author=self.author)
+        posts = [Post.objects.create(text=const.POST_TEXT2,
+                                     author=self.author) for _ in range(2)]
+        for user in (self.user, reader):
+            with self.subTest(user=user):
+                self.assertEqual(
+                    set(TimelineEntry.objects.filter(user=user).values_list(
+                        'post_id', flat=True)),
+                    {post.id for post in posts})
+
+    @override_settings(TIMELINE_LENGTH=3, TIMELINE_DELIVERY_BATCH=1)
+    def test_rebuild_matches_delivery(self):
+        """Rebuilt timelines equal the ones maintained on write."""
+        reader = User.objects.create_user(username=const.USER_NAME + '2')
+        for user in (self.user, reader):
+            Follow.objects.create(user=user, author=self.author)
+        Follow.objects.create(user=self.user, author=reader)
+        for author in (self.author, reader, self.author):
+            Post.objects.create(text=const.POST_TEXT2, author=author)
+        timelines = set(TimelineEntry.objects.values_list(
+            'user_id', 'post_id', 'author_id', 'pub_date'))
+        TimelineEntry.objects.all().delete()
+        TimelineEntry.objects.create(
+            user=self.author, post=self.old_post, author=self.author,
+            pub_date=self.old_post.pub_date)
+        timeline.rebuild()
+        self.assertEqual(set(TimelineEntry.objects.values_list(
+            'user_id', 'post_id', 'author_id', 'pub_date')), timelines)
+
+    def test_rebuild_of_chosen_users(self):
+        """Only timelines of the given users are rebuilt."""
+        reader = User.objects.create_user(username=const.USER_NAME + '2')
+        for user in (self.user, reader):
+            Follow.objects.create(user=user, author=self.author)
+        TimelineEntry.objects.all().delete()
+        timeline.rebuild([self.user.id])
+        self.assertEqual(self.entries(), {self.old_post.id})
+        self.assertFalse(TimelineEntry.objects.filter(user=reader).exists())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_rebuild_skips_celebrities(self):
+        """Posts of celebrities are left to be merged on read."""
+        Follow.objects.create(user=self.user, author=self.author)
+        timeline.rebuild()
+        self.assertEqual(self.entries(), set())
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=0)
+    def test_celebrity_read_on_request(self):
+        """Posts of authors with many followers are merged on read."""
+        Follow.objects.create(user=self.user, author=self.author)
+        post = Post.objects.create(text=const.POST_TEXT2, author=self.author)
+        self.assertEqual(self.entries(), set())
+        self.assertEqual(
+            list(TimelinePaginator(self.user, 10).page()),
+            [post, self.old_post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_merged_feed_pages(self):
+        """Cursors walk delivered and celebrity posts in feed order."""
+        celebrity = User.objects.create_user(username=const.USER_NAME + '2')
+        reader = User.objects.create_user(username=const.USER_NAME + '3')
+        for user, author in ((self.user, self.author),
+                             (self.user, celebrity), (reader, celebrity)):
+            Follow.objects.create(user=user, author=author)
+        for _ in range(4):
+            for author in (self.author, celebrity):
+                Post.objects.create(text=const.POST_TEXT2, author=author)
+        expected = list(Post.objects.filter(
+            author__in=(self.author, celebrity)).order_by('-pub_date', '-id'))
+        paginator = TimelinePaginator(self.user, 3)
+        pages = [list(paginator.page())]
+        while paginator.next_cursor:
+            pages.append(list(paginator.page(paginator.next_cursor)))
+        self.assertEqual(sum(pages, []), expected)
+        pages.pop()
+        while paginator.previous_cursor:
+            self.assertEqual(
+                list(paginator.page(paginator.previous_cursor)), pages.pop())
+        self.assertEqual(pages, [])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1, JOBS_EAGER=True)
+    def test_posts_kept_when_author_drops_below_limit(self):
+        """Posts merged on read are delivered once the author drops back."""
+        reader = User.objects.create_user(username=const.USER_NAME + '2')
+        for user in (self.user, reader):
+            Follow.objects.create(user=user, author=self.author)
+        post = Post.objects.create(text=const.POST_TEXT2, author=self.author)
+        self.assertEqual(self.entries(), {self.old_post.id})
+        Follow.objects.get(user=reader).delete()
+        self.assertEqual(self.entries(), {self.old_post.id, post.id})
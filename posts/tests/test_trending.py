@@ -0,0 +1,69 @@
+import datetime as dt
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts import trending
+from posts.models import Comment, Follow, Post
+from posts.tests import const
+
+User = get_user_model()
+
+
+class TrendingTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.author = User.objects.create_user(username=const.AUTHOR_NAME)
+        self.old = self.add_post(days=3)
+        self.new = self.add_post()
+
+    def add_post(self, days=0):
+        post = Post.objects.create(text=const.POST_TEXT, author=self.author)
+        Post.objects.filter(pk=post.pk).update(
+            score=trending.event_score(
+                1, timezone.now() - dt.timedelta(days=days)))
+        post.refresh_from_db()
+        return post
+
+    def ranking(self):
+        response = Client().get(reverse('trending'))
+        return [post.id for post in response.context['page']]
+
+    def test_new_post_scored(self):
+        post = Post.objects.create(text=const.POST_TEXT, author=self.author)
+        self.assertAlmostEqual(post.score, trending.event_score(1), places=3)
+        self.assertEqual(self.ranking()[:3],
+                         [post.id, self.new.id, self.old.id])
+
+    def test_comment_adds_decayed_weight(self):
+        """A fresh comment counts as much as a fresh post."""
+        score = self.old.score
+        comment = Comment.objects.create(text=const.COMMENT_TEXT,
+                                         author=self.user, post=self.old)
+        self.old.refresh_from_db()
+        self.assertAlmostEqual(
+            self.old.score,
+            trending.add(score, trending.event_score(1, comment.created)))
+        self.assertEqual(self.ranking(), [self.old.id, self.new.id])
+
+    @override_settings(TRENDING_FOLLOW_POSTS=1)
+    def test_follow_lifts_latest_posts(self):
+        scores = {self.old.id: self.old.score, self.new.id: self.new.score}
+        Follow.objects.create(user=self.user, author=self.author)
+        self.old.refresh_from_db()
+        self.new.refresh_from_db()
+        self.assertEqual(self.old.score, scores[self.old.id])
+        self.assertGreater(self.new.score, scores[self.new.id])
+
+    def test_rebuild_matches_incremental(self):
+        for _ in range(3):
+            Comment.objects.create(text=const.COMMENT_TEXT,
+                                   author=self.user, post=self.new)
+        self.new.refresh_from_db()
+        Post.objects.update(score=0)
+        trending.rebuild()
+        rebuilt = Post.objects.get(pk=self.new.pk).score
+        # The incremental score began from the post's publication too.
+        self.assertAlmostEqual(rebuilt, self.new.score, places=3)
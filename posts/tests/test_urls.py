@@ -9,6 +9,7 @@ from django.urls import reverse
 
 from posts.models import Group, Post
 from posts.tests import const
+from users.forms import CreationForm
 
 User = get_user_model()
 
@@ -135,3 +136,18 @@ class PostsURLTests(TestCase):
         """Site returns 404 if page not found."""
         response = self.guest_client.get(const.NOT_EXIST_URL, follow=True)
         self.assertEqual(response.status_code, 404)
+
+
+class ReservedUsernameTest(TestCase):
+    def refused(self, username):
+        form = CreationForm(data={'username': username,
+                                  'password1': 'x7-Kp2!qLm9',
+                                  'password2': 'x7-Kp2!qLm9'})
+        return form.has_error('username', 'reserved')
+
+    def test_page_names_reserved(self):
+        """Signup refuses names whose profile URL a page would shadow."""
+        for username in ('group', 'trending', 'search'):
+            with self.subTest(username=username):
+                self.assertTrue(self.refused(username))
+        self.assertFalse(self.refused(const.USER_NAME))
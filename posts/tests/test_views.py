@@ -11,13 +11,14 @@ from django.urls import reverse
 
 from posts.models import Follow, Group, Post
 from posts.tests import const
+from posts.thumbnails import render_thumbnails
 
 User = get_user_model()
 
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, ANONYMOUS_PAGE_CACHE_VIEWS=[])
 class PostPagesTest(TestCase):
     @classmethod
     def setUpClass(cls):
@@ -254,3 +255,40 @@ class PostPagesTest(TestCase):
         self.assertEqual(post_edited.image, 'posts/image.gif')
         self.assertEqual(post_edited.author, self.user)
         self.assertEqual(Post.objects.count(), posts_count)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class ThumbnailsTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username=const.USER_NAME)
+        self.guest_client = Client()
+        self.post = Post.objects.create(
+            text=const.POST_TEXT,
+            author=self.user,
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=const.PICT,
+                content_type='image/gif'
+            )
+        )
+
+    def test_original_image_until_thumbnails_ready(self):
+        """Card shows the original image before thumbnails are rendered."""
+        response = self.guest_client.get(const.PROFILE_USER_URL)
+        self.assertContains(response, f'src="{self.post.image.url}"')
+        self.assertNotContains(response, 'srcset')
+
+    def test_thumbnails_rendered_once(self):
+        """Rendered thumbnails are stored on the post and used by cards."""
+        render_thumbnails(self.post.id)
+        post = Post.objects.get(id=self.post.id)
+        self.assertEqual(
+            list(post.thumbnail_urls), list(settings.THUMBNAIL_SIZES))
+        response = self.guest_client.get(const.PROFILE_USER_URL)
+        self.assertContains(response, f'src="{post.image_src}"')
+        self.assertContains(response, post.image_srcset)
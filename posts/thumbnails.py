@@ -0,0 +1,33 @@
+"""Thumbnails rendered once, when a post image is saved.
+
+Feeds only print the stored URLs, so rendering a card never asks
+sorl-thumbnail's key-value store or Pillow for anything.
+"""
+import json
+
+from django.conf import settings
+from sorl.thumbnail import get_thumbnail
+
+from posts.cache import invalidate, mark_modified, post_scopes
+from posts.jobs import enqueue
+from posts.models import Post
+
+
+def render_thumbnails(post_id):
+    """Render all THUMBNAIL_SIZES of the post image and store their URLs."""
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return
+    urls = {size: get_thumbnail(post.image, size,
+                                crop='center', upscale=True).url
+            for size in settings.THUMBNAIL_SIZES}
+    updated = Post.objects.filter(pk=post_id, image=post.image.name).update(
+        thumbnails=json.dumps(urls))
+    if updated:
+        invalidate(*post_scopes(post))
+        mark_modified()
+
+
+def schedule_thumbnails(post):
+    """Queue rendering of the post thumbnails."""
+    enqueue(render_thumbnails, post.pk)
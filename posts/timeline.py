@@ -0,0 +1,251 @@
+"""Materialized subscription feeds.
+
+Posts are copied into followers' timelines when they are published
+(fan-out on write). Authors with more than ``TIMELINE_FANOUT_LIMIT``
+followers are skipped and merged in on read instead, and their
+followers are backfilled once the author drops back to the limit.
+"""
+import heapq
+from itertools import chain, islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from posts.jobs import enqueue
+from posts.models import AuthorStats, Follow, Post, TimelineEntry
+from posts.pagination import CursorPaginator
+
+
+def is_celebrity(author_id):
+    return AuthorStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT).exists()
+
+
+def fan_out(post):
+    """Deliver a new post to every follower of its author.
+
+    Small audiences are served inline so the author's followers see the
+    post at once; larger ones are handed to the job queue.
+    """
+    stats = AuthorStats.objects.filter(user_id=post.author_id).first()
+    followers = stats.followers_count if stats else 0
+    if followers > settings.TIMELINE_FANOUT_LIMIT:
+        return
+    if followers > settings.TIMELINE_SYNC_FANOUT:
+        enqueue(deliver_later, post.pk)
+    else:
+        deliver(post)
+
+
+def deliver_later(post_id):
+    post = Post.objects.filter(pk=post_id).first()
+    if post is not None:
+        deliver(post)
+
+
+def deliver(post):
+    followers = Follow.objects.filter(
+        author_id=post.author_id).values_list('user_id', flat=True).iterator()
+    while True:
+        user_ids = list(islice(followers, settings.TIMELINE_DELIVERY_BATCH))
+        if not user_ids:
+            break
+        TimelineEntry.objects.bulk_create(
+            (TimelineEntry(user_id=user_id,
+                           post_id=post.pk,
+                           author_id=post.author_id,
+                           pub_date=post.pub_date)
+             for user_id in user_ids),
+            ignore_conflicts=True)
+        trim_many(user_ids)
+
+
+def deliver_many(posts):
+    """Deliver posts saved without signals, such as imported ones."""
+    by_author = {}
+    for post in posts:
+        by_author.setdefault(post.author_id, []).append(post)
+    celebrities = AuthorStats.objects.filter(
+        user_id__in=by_author,
+        followers_count__gt=settings.TIMELINE_FANOUT_LIMIT).values_list(
+        'user_id', flat=True)
+    follows = Follow.objects.filter(author_id__in=by_author).exclude(
+        author_id__in=celebrities).order_by('user_id').values_list(
+        'user_id', 'author_id').iterator()
+    while True:
+        batch = list(islice(follows, settings.TIMELINE_DELIVERY_BATCH))
+        if not batch:
+            break
+        TimelineEntry.objects.bulk_create(
+            (TimelineEntry(user_id=user_id,
+                           post_id=post.pk,
+                           author_id=author_id,
+                           pub_date=post.pub_date)
+             for user_id, author_id in batch
+             for post in by_author[author_id]),
+            ignore_conflicts=True)
+        trim_many({user_id for user_id, _ in batch})
+
+
+def backfill(user_id, author_id):
+    """Copy latest posts of a newly followed author into the timeline."""
+    if is_celebrity(author_id):
+        return
+    posts = Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id').values_list('id', 'pub_date')
+    TimelineEntry.objects.bulk_create(
+        (TimelineEntry(user_id=user_id,
+                       post_id=post_id,
+                       author_id=author_id,
+                       pub_date=pub_date)
+         for post_id, pub_date in posts[:settings.TIMELINE_LENGTH]),
+        ignore_conflicts=True)
+    trim(user_id)
+
+
+def restore(author_id):
+    """Deliver posts of an author who has just dropped to the limit.
+
+    While the author was above ``TIMELINE_FANOUT_LIMIT`` their posts were
+    only merged on read, so without a backfill they would vanish from
+    the feeds of the remaining followers.
+    """
+    if AuthorStats.objects.filter(
+            user_id=author_id,
+            followers_count=settings.TIMELINE_FANOUT_LIMIT).exists():
+        enqueue(backfill_followers, author_id)
+
+
+def backfill_followers(author_id):
+    followers = Follow.objects.filter(
+        author_id=author_id).values_list('user_id', flat=True)
+    for user_id in followers.iterator():
+        backfill(user_id, author_id)
+
+
+def remove(user_id, author_id):
+    """Drop posts of an unfollowed author from the timeline."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def trim(user_id):
+    """Keep only the latest ``TIMELINE_LENGTH`` entries."""
+    stale = TimelineEntry.objects.filter(user_id=user_id).order_by(
+        '-pub_date', '-id').values_list('id', flat=True)
+    stale = list(stale[settings.TIMELINE_LENGTH:])
+    if stale:
+        TimelineEntry.objects.filter(id__in=stale).delete()
+
+
+def trim_many(user_ids):
+    """Trim only the timelines of the users that outgrew the limit."""
+    overgrown = TimelineEntry.objects.filter(
+        user_id__in=user_ids).values('user_id').annotate(
+        entries=Count('id')).filter(
+        entries__gt=settings.TIMELINE_LENGTH).order_by().values_list(
+        'user_id', flat=True)
+    for user_id in overgrown:
+        trim(user_id)
+
+
+def rebuild(user_ids=None):
+    """Recreate timelines from follows, every timeline by default.
+
+    Followers are rebuilt a batch at a time, each batch in its own
+    transaction, so feeds are never seen empty. The latest posts of an
+    author are read once per batch and merged per follower in memory.
+    """
+    if user_ids is None:
+        TimelineEntry.objects.exclude(
+            user_id__in=Follow.objects.values('user_id')).delete()
+        user_ids = Follow.objects.order_by('user_id').values_list(
+            'user_id', flat=True).distinct().iterator()
+    user_ids = iter(user_ids)
+    while True:
+        batch = list(islice(user_ids, settings.TIMELINE_DELIVERY_BATCH))
+        if not batch:
+            break
+        with transaction.atomic():
+            TimelineEntry.objects.filter(user_id__in=batch).delete()
+            TimelineEntry.objects.bulk_create(
+                timeline_entries(batch),
+                batch_size=settings.TIMELINE_DELIVERY_BATCH)
+
+
+def timeline_entries(user_ids):
+    """Entries of freshly built timelines of the users."""
+    followed = {}
+    for user_id, author_id in Follow.objects.filter(
+            user_id__in=user_ids).exclude(
+            author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT
+    ).values_list('user_id', 'author_id'):
+        followed.setdefault(user_id, []).append(author_id)
+    latest = {}
+    for author_id in set(chain.from_iterable(followed.values())):
+        posts = Post.objects.filter(author_id=author_id).order_by(
+            '-pub_date', '-id').values_list('pub_date', 'id')
+        latest[author_id] = [
+            (pub_date, post_id, author_id)
+            for pub_date, post_id in posts[:settings.TIMELINE_LENGTH]]
+    for user_id, author_ids in followed.items():
+        posts = heapq.nlargest(
+            settings.TIMELINE_LENGTH,
+            chain.from_iterable(latest[author_id] for author_id in author_ids))
+        for pub_date, post_id, author_id in posts:
+            yield TimelineEntry(user_id=user_id,
+                                post_id=post_id,
+                                author_id=author_id,
+                                pub_date=pub_date)
+
+
+def celebrity_ids(user):
+    """Followed authors whose posts are not fanned out."""
+    return list(Follow.objects.filter(
+        user=user,
+        author__stats__followers_count__gt=settings.TIMELINE_FANOUT_LIMIT,
+    ).values_list('author_id', flat=True))
+
+
+class TimelinePaginator(CursorPaginator):
+    """Subscription feed merged on read from bounded slices.
+
+    A page reads one page of the user's timeline and one page of the
+    latest posts of every followed celebrity, each an index range, and
+    sorts only those rows in Python. Posts are then loaded by id.
+    """
+
+    def __init__(self, user, per_page, celebrities=None):
+        super().__init__(Post.objects.feed(), per_page)
+        self.user = user
+        self.celebrities = celebrities
+
+    def slices(self, position, limit):
+        """Querysets of ``(pub_date, post id)`` beyond the position."""
+        if self.celebrities is None:
+            self.celebrities = celebrity_ids(self.user)
+        sources = [(TimelineEntry.objects.filter(user=self.user),
+                    ('-pub_date', '-post_id'))]
+        sources += [(Post.objects.filter(author_id=author_id),
+                     ('-pub_date', '-id'))
+                    for author_id in self.celebrities]
+        for queryset, ordering in sources:
+            queryset = queryset.order_by(*ordering)
+            if position is not None:
+                backwards, values = position
+                queryset = queryset.filter(
+                    self.beyond(values, backwards, ordering))
+                if backwards:
+                    queryset = queryset.reverse()
+            yield queryset.values_list(
+                *(field.lstrip('-') for field in ordering))[:limit]
+
+    def fetch(self, position, limit):
+        backwards = position is not None and position[0]
+        keys = set()
+        for queryset in self.slices(position, limit):
+            keys.update(queryset)
+        keys = sorted(keys, reverse=not backwards)[:limit]
+        posts = self.object_list.in_bulk([post_id for _, post_id in keys])
+        return [posts[post_id] for _, post_id in keys if post_id in posts]
@@ -0,0 +1,93 @@
+"""Trending posts ranked by time-decayed activity.
+
+Every event adds ``weight * 2 ** (age / TRENDING_HALF_LIFE)`` to the
+post, with the age counted from a fixed epoch rather than back from
+now, so scores of idle posts never have to change: newer events simply
+weigh more. ``Post.score`` keeps the natural logarithm of that sum to
+stay within float range, and events are added by a single UPDATE doing
+``log(exp(score) + exp(event))``. The top of the ranking is an index
+range read on ``(-score, -id)``.
+
+A post starts with the weight of its publication, comments add to it
+and so do new followers of the author, for the author's latest posts.
+"""
+import datetime as dt
+import math
+
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Abs, Exp, Greatest, Ln
+from django.utils import timezone
+
+from posts.models import Comment, Post
+
+EPOCH = dt.datetime(2020, 1, 1, tzinfo=dt.timezone.utc)
+
+
+def event_score(weight, when=None):
+    """Logarithm of the weight of an event happening at ``when``."""
+    when = when or timezone.now()
+    if timezone.is_naive(when):
+        when = timezone.make_aware(when)
+    age = (when - EPOCH).total_seconds()
+    return math.log(weight) + age * math.log(2) / settings.TRENDING_HALF_LIFE
+
+
+def add(score, event):
+    """Logarithm of the sum of two weights given by their logarithms."""
+    high, low = max(score, event), min(score, event)
+    return high + math.log1p(math.exp(low - high))
+
+
+def bump(queryset, weight, when=None):
+    """Add an event to the scores of the posts in one UPDATE."""
+    event = Value(event_score(weight, when), output_field=FloatField())
+    score = F('score')
+    queryset.update(score=Greatest(score, event) + Ln(
+        Value(1.0) + Exp(-Abs(score - event))))
+
+
+def on_comment(comment):
+    bump(Post.objects.filter(pk=comment.post_id),
+         settings.TRENDING_COMMENT_WEIGHT, comment.created)
+
+
+def on_follow(follow):
+    latest = Post.objects.filter(author_id=follow.author_id).order_by(
+        '-pub_date', '-id').values_list(
+            'pk', flat=True)[:settings.TRENDING_FOLLOW_POSTS]
+    # Not every database can LIMIT a subquery of an UPDATE.
+    bump(Post.objects.filter(pk__in=list(latest)),
+         settings.TRENDING_FOLLOW_WEIGHT)
+
+
+def scores(posts, comments):
+    """Scores of posts from their publication and comments.
+
+    Follows carry no date, so they are left out of a recount.
+    """
+    result = {pk: event_score(settings.TRENDING_POST_WEIGHT, pub_date)
+              for pk, pub_date in posts.values_list('pk', 'pub_date')}
+    for post_id, created in comments.values_list(
+            'post_id', 'created').iterator():
+        result[post_id] = add(result[post_id], event_score(
+            settings.TRENDING_COMMENT_WEIGHT, created))
+    return result
+
+
+def store(result, model, batch_size=2000):
+    items = list(result.items())
+    for start in range(0, len(items), batch_size):
+        model.objects.bulk_update(
+            [model(pk=pk, score=score)
+             for pk, score in items[start:start + batch_size]],
+            ['score'])
+
+
+def rebuild(post_ids=None):
+    """Recount scores of every post, or only of the given ones."""
+    posts, comments = Post.objects.all(), Comment.objects.all()
+    if post_ids is not None:
+        posts = posts.filter(pk__in=post_ids)
+        comments = comments.filter(post__in=post_ids)
+    store(scores(posts, comments), Post)
@@ -6,6 +6,9 @@ urlpatterns = [
     path('new/',
          views.new_post,
          name='new_post'),
+    path('group/',
+         views.groups_index,
+         name='groups'),
     path('group/<slug:slug>/',
          views.group_posts,
          name='group_posts'),
@@ -15,12 +18,27 @@ urlpatterns = [
     path('follow/',
          views.follow_index,
          name='follow_index'),
+    path('api/posts/',
+         views.api_posts,
+         name='api_posts'),
+    path('api/comments/',
+         views.api_comments,
+         name='api_comments'),
+    path('trending/',
+         views.trending,
+         name='trending'),
+    path('search/',
+         views.search_posts,
+         name='search'),
     path('<str:username>/',
          views.profile,
          name='profile'),
     path('<str:username>/<int:post_id>/',
          views.post_view,
          name='post'),
+    path('<str:username>/<int:post_id>/comments/',
+         views.post_comments,
+         name='post_comments'),
     path('<str:username>/<int:post_id>/edit/',
          views.post_edit,
          name='post_edit'),
@@ -1,10 +1,17 @@
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
 from django.core.paginator import Paginator
+from django.http import HttpResponseBadRequest, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 
+from posts import export
+from posts.cache import feed_version
 from posts.forms import CommentForm, PostForm
 from posts.models import Follow, Group, Post, User
+from posts.pagination import CursorPaginator
+from posts.search import search
+from posts.thumbnails import schedule_thumbnails
+from posts.timeline import TimelinePaginator
 
 
 def page_not_found(request, exception):
@@ -20,23 +27,58 @@ def server_error(request):
     return render(request, 'misc/500.html', status=500)
 
 
+def get_page(request, post_list):
+    paginator = CursorPaginator(post_list, settings.PAGINATION_PER_PAGE)
+    return paginator.get_page(request.GET.get('cursor'))
+
+
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.PAGINATION_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'posts/index.html', {'page': page})
+    post_list = Post.objects.feed()
+    page = get_page(request, post_list)
+    return render(
+        request,
+        'posts/index.html',
+        {'page': page, 'feed_version': feed_version('index')})
+
+
+def groups_index(request):
+    paginator = CursorPaginator(Group.objects.select_related('stats'),
+                                settings.PAGINATION_PER_PAGE,
+                                ordering=('title', 'id'))
+    page = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'posts/groups.html', {'page': page})
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
-    paginator = Paginator(post_list, settings.PAGINATION_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
+    group = get_object_or_404(Group.objects.select_related('stats'),
+                              slug=slug)
+    post_list = group.posts.feed()
+    page = get_page(request, post_list)
     return render(request,
                   'posts/group.html',
-                  {'group': group, 'page': page})
+                  {'group': group,
+                   'page': page,
+                   'feed_version': feed_version(f'group:{group.id}')})
+
+
+def trending(request):
+    paginator = CursorPaginator(Post.objects.feed(),
+                                settings.PAGINATION_PER_PAGE,
+                                ordering=('-score', '-id'))
+    page = paginator.get_page(request.GET.get('cursor'))
+    return render(request, 'posts/trending.html', {'page': page})
+
+
+def search_posts(request):
+    query = request.GET.get('q', '').strip()
+    paginator = Paginator(search(query) if query else [],
+                          settings.PAGINATION_PER_PAGE)
+    page = paginator.get_page(request.GET.get('page'))
+    posts = Post.objects.feed().in_bulk(page.object_list)
+    page.object_list = [posts[pk] for pk in page.object_list if pk in posts]
+    return render(request,
+                  'posts/search.html',
+                  {'query': query, 'page': page})
 
 
 @login_required
@@ -46,27 +88,23 @@ def new_post(request):
         instance = form.save(commit=False)
         instance.author = request.user
         instance.save()
+        if instance.image:
+            schedule_thumbnails(instance)
         return redirect('index')
     return render(request, 'posts/new.html', {'form': form})
 
 
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
-    paginator = Paginator(post_list, settings.PAGINATION_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    # following = False
-    # if request.user.is_authenticated:
-    #    following = Follow.objects.filter(
-    #        user=request.user,
-    #        author=author).exists()
-    following = (request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author__username=username).exists())
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username)
+    post_list = author.posts.feed()
+    page = get_page(request, post_list)
     return render(
         request,
         'posts/profile.html',
-        {'author': author, 'page': page, 'following': following})
+        {'author': author,
+         'page': page,
+         'feed_version': feed_version(f'profile:{author.id}')})
 
 
 @login_required
@@ -82,18 +120,43 @@ def add_comment(request, username, post_id):
     return redirect('post', username=username, post_id=post_id)
 
 
+def get_comments_page(request, post):
+    """Comments with their authors and one slice of them to show."""
+    comments = post.comments.select_related('author')
+    paginator = CursorPaginator(comments, settings.COMMENTS_PER_PAGE,
+                                ordering=('-created', '-id'))
+    return comments, paginator.get_page(request.GET.get('cursor'))
+
+
 def post_view(request, username, post_id):
     author = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, pk=post_id, author=author)
-    following = (request.user.is_authenticated and Follow.objects.filter(
-        user=request.user, author__username=username).exists())
+    post = get_object_or_404(
+        Post.objects.feed().select_related('author__stats'),
+        pk=post_id,
+        author=author)
+    comments, comments_page = get_comments_page(request, post)
     form = CommentForm()
     return render(
         request,
         'posts/post.html',
         {'post': post,
          'form': form,
-         'following': following})
+         'comments': comments,
+         'comments_page': comments_page})
+
+
+def post_comments(request, username, post_id):
+    """Next slice of comments for the "show more" button."""
+    post = get_object_or_404(
+        Post.objects.select_related('author'),
+        pk=post_id,
+        author__username=username)
+    _, comments_page = get_comments_page(request, post)
+    return render(
+        request,
+        'includes/comment_list.html',
+        {'post': post,
+         'comments_page': comments_page})
 
 
 @login_required
@@ -108,7 +171,12 @@ def post_edit(request, username, post_id):
         instance=post_requested)
     if request.method == 'POST':
         if form.is_valid():
-            form.save()
+            post = form.save(commit=False)
+            if 'image' in form.changed_data:
+                post.thumbnails = ''
+            post.save()
+            if post.image and not post.thumbnails:
+                schedule_thumbnails(post)
             return redirect('post', username=username, post_id=post_id)
     return render(
         request, 'posts/new.html',
@@ -118,12 +186,13 @@ def post_edit(request, username, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(
-        post_list, settings.PAGINATION_PER_PAGE)
-    page_number = request.GET.get('page')
-    page = paginator.get_page(page_number)
-    return render(request, 'follow.html', {'page': page})
+    paginator = TimelinePaginator(request.user, settings.PAGINATION_PER_PAGE)
+    page = paginator.get_page(request.GET.get('cursor'))
+    version = feed_version('index', f'follow:{request.user.id}')
+    return render(
+        request,
+        'follow.html',
+        {'page': page, 'feed_version': version})
 
 
 @login_required
@@ -141,3 +210,46 @@ def profile_unfollow(request, username):
     author = User.objects.get(username=username)
     Follow.objects.get(user=user, author=author).delete()
     return redirect('profile', username=username)
+
+
+def stream_export(request, queryset, serialize):
+    limit = request.GET.get('limit', '')
+    if limit and not limit.isdigit():
+        return HttpResponseBadRequest('limit must be a number')
+    # Rows are read while the response streams, after the database
+    # router middleware is done, so the database is chosen now.
+    queryset = queryset.using(queryset.db)
+    lines = export.ndjson(queryset, serialize, int(limit) if limit else None)
+    if request.GET.get('format') == 'json':
+        return StreamingHttpResponse(
+            export.json_array(lines), content_type='application/json')
+    return StreamingHttpResponse(
+        lines, content_type='application/x-ndjson; charset=utf-8')
+
+
+def get_cursor(request):
+    after = request.GET.get('after', '0')
+    return int(after) if after.isdigit() else None
+
+
+def api_posts(request):
+    after = get_cursor(request)
+    if after is None:
+        return HttpResponseBadRequest('after must be a post id')
+    posts = export.posts(author=request.GET.get('author'),
+                         group=request.GET.get('group'),
+                         after=after)
+    return stream_export(request, posts, export.post_record)
+
+
+def api_comments(request):
+    after = get_cursor(request)
+    if after is None:
+        return HttpResponseBadRequest('after must be a comment id')
+    post = request.GET.get('post')
+    if post is not None and not post.isdigit():
+        return HttpResponseBadRequest('post must be a post id')
+    comments = export.comments(author=request.GET.get('author'),
+                               post=post,
+                               after=after)
+    return stream_export(request, comments, export.comment_record)
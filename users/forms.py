@@ -1,10 +1,37 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
+from django.core.exceptions import ValidationError
+from django.urls import get_resolver
 
 User = get_user_model()
 
 
+def reserved_usernames(patterns=None):
+    """First path segments of site pages, which profile URLs would lose to.
+
+    Profiles live at ``/<username>/``, after every other page, so a user
+    named like a page such as ``group`` could never be reached.
+    """
+    if patterns is None:
+        patterns = get_resolver().url_patterns
+    names = set()
+    for pattern in patterns:
+        segment = str(pattern.pattern).split('/')[0]
+        if not segment and hasattr(pattern, 'url_patterns'):
+            names |= reserved_usernames(pattern.url_patterns)
+        elif segment and not segment.startswith(('<', '^')):
+            names.add(segment)
+    return names
+
+
 class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+    def clean_username(self):
+        username = self.cleaned_data['username']
+        if username in reserved_usernames():
+            raise ValidationError('Это имя занято адресом страницы сайта.',
+                                  code='reserved')
+        return username
@@ -0,0 +1,15 @@
+"""ASGI entry point, e.g. ``uvicorn yatube.asgi:application``.
+
+Django 2.2 has neither an ASGI handler nor async views, so the WSGI
+application runs in asgiref's thread pool (``ASGI_THREADS`` threads).
+The server handles connections and slow clients in its event loop and
+only occupies a thread while Django works on a request.
+"""
+import os
+
+from asgiref.wsgi import WsgiToAsgi
+from django.core.wsgi import get_wsgi_application
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+application = WsgiToAsgi(get_wsgi_application())
@@ -1,5 +1,10 @@
 import datetime as dt
 
+from django.utils.functional import SimpleLazyObject
+
+from posts.following import followed_ids
+from yatube.routers import cache_timeout
+
 
 def year(request):
     """
@@ -7,3 +12,18 @@ def year(request):
     """
     year = dt.datetime.now().year
     return {'year': year}
+
+
+def following(request):
+    """
+    Добавляет множество id авторов, на которых подписан пользователь.
+    """
+    return {'followed_ids': SimpleLazyObject(
+        lambda: followed_ids(request.user))}
+
+
+def fragment_cache(request):
+    """
+    Добавляет время хранения фрагментов ленты в кэше.
+    """
+    return {'fragment_timeout': cache_timeout(None)}
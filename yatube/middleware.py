@@ -0,0 +1,142 @@
+import contextlib
+import hashlib
+import random
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from posts.cache import last_modified
+from yatube import perf, routers
+from yatube.querylog import QueryLog
+
+
+class AnonymousPageCacheMiddleware:
+    """Serve whole pages to anonymous visitors from cache.
+
+    Pages of ``ANONYMOUS_PAGE_CACHE_VIEWS`` are stored under the time of
+    the latest content change, which also becomes their ``ETag``, so
+    conditional requests are answered with 304 without touching the
+    database. ``Last-Modified`` has whole seconds, so it is sent only once
+    the second of the latest change is over and no other change can share
+    it. Authenticated users always get fresh pages.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not self.is_cacheable(request):
+            return self.get_response(request)
+        modified = last_modified()
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        etag = quote_etag(f'{modified:.6f}-{path}')
+        settled = int(time.time()) > int(modified)
+        response = get_conditional_response(
+            request, etag=etag,
+            last_modified=int(modified) if settled else None)
+        if response is None:
+            key = f'page:{modified:.6f}:{path}'
+            response = cache.get(key)
+            if response is None:
+                response = self.get_response(request)
+                if response.status_code != 200 or response.cookies:
+                    return response
+                cache.set(key, response, routers.cache_timeout(
+                    settings.ANONYMOUS_PAGE_CACHE_TIMEOUT))
+        response['ETag'] = etag
+        if settled:
+            response['Last-Modified'] = http_date(modified)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    def is_cacheable(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if request.user.is_authenticated:
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.view_name in settings.ANONYMOUS_PAGE_CACHE_VIEWS
+
+
+class PerformanceMiddleware:
+    """Record timings of sampled requests, see ``yatube.perf``."""
+
+    def __init__(self, get_response):
+        if not settings.PERF_RECORD:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        perf.instrument_templates()
+
+    def __call__(self, request):
+        if random.random() >= settings.PERF_SAMPLE_RATE:
+            return self.get_response(request)
+        with perf.measure(request) as record:
+            response = self.get_response(request)
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            # Pages served by middleware never reach URL resolution.
+            try:
+                match = resolve(request.path_info)
+            except Resolver404:
+                pass
+        record['view'] = match.view_name if match else None
+        record['status'] = response.status_code
+        perf.store(record)
+        return response
+
+
+class QueryLogMiddleware:
+    """Report slow and repeated queries, see ``yatube.querylog``."""
+
+    def __init__(self, get_response):
+        if not settings.QUERYLOG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        log = QueryLog(request)
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            response = self.get_response(request)
+        log.report()
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """Serve read-only views from replicas, see ``yatube.routers``."""
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        reads = (routers.replica_reads() if self.is_read_only(request)
+                 else contextlib.nullcontext())
+        with routers.track_writes() as writes, reads:
+            response = self.get_response(request)
+        if writes:
+            response.set_cookie(routers.PIN_COOKIE, '1',
+                                max_age=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    def is_read_only(self, request):
+        if request.method not in ('GET', 'HEAD'):
+            return False
+        if routers.PIN_COOKIE in request.COOKIES:
+            return False
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return False
+        return match.view_name in settings.REPLICA_VIEWS
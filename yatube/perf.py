@@ -0,0 +1,189 @@
+"""Timings of individual requests kept in a ring buffer in the cache.
+
+While a request is measured, database queries of every connection,
+``get``/``get_many`` calls on caches and template rendering add to its
+record. Finished records go to ``PERF_BUFFER_SIZE`` slots of the
+``PERF_CACHE`` cache, so with a shared backend all workers feed one
+buffer and the oldest records are simply overwritten.
+
+The debug toolbar swaps caches for its own trackers, cache lookups are
+only counted with the toolbar switched off.
+"""
+import contextlib
+import functools
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+from django.template.base import Template
+
+SLOT_KEY = 'perf:slot:{}'
+
+HEAD_KEY = 'perf:head'
+
+_local = threading.local()
+
+
+def current():
+    """Record of the request measured in this thread, if any."""
+    return getattr(_local, 'record', None)
+
+
+def count_query(execute, sql, params, many, context):
+    record = current()
+    if record is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record['db_queries'] += 1
+        record['db_ms'] += (time.perf_counter() - started) * 1000
+
+
+def instrument_cache(cache):
+    """Count hits and misses of ``get`` and ``get_many`` on a cache.
+
+    Backends implementing one through the other are counted once.
+    """
+    if getattr(cache, '_perf_instrumented', False):
+        return
+    get, get_many = cache.get, cache.get_many
+    missing = object()
+
+    def lookup(method, *args, **kwargs):
+        nested = getattr(_local, 'in_cache', False)
+        _local.in_cache = True
+        try:
+            return nested, method(*args, **kwargs)
+        finally:
+            _local.in_cache = nested
+
+    @functools.wraps(get)
+    def counted_get(key, default=None, version=None):
+        nested, value = lookup(get, key, missing, version=version)
+        record = current()
+        if record is not None and not nested:
+            record['cache_misses' if value is missing else 'cache_hits'] += 1
+        return default if value is missing else value
+
+    @functools.wraps(get_many)
+    def counted_get_many(keys, version=None):
+        keys = list(keys)
+        nested, values = lookup(get_many, keys, version=version)
+        record = current()
+        if record is not None and not nested:
+            record['cache_hits'] += len(values)
+            record['cache_misses'] += len(keys) - len(values)
+        return values
+
+    cache.get, cache.get_many = counted_get, counted_get_many
+    cache._perf_instrumented = True
+
+
+def instrument_templates():
+    """Time outermost renders of Django templates."""
+    render = Template.render
+    if getattr(render, '_perf_instrumented', False):
+        return
+
+    @functools.wraps(render)
+    def timed_render(self, context):
+        record = current()
+        if record is None or record['_rendering']:
+            return render(self, context)
+        record['_rendering'] = True
+        started = time.perf_counter()
+        try:
+            return render(self, context)
+        finally:
+            record['_rendering'] = False
+            record['template_ms'] += (time.perf_counter() - started) * 1000
+
+    timed_render._perf_instrumented = True
+    Template.render = timed_render
+
+
+@contextlib.contextmanager
+def measure(request):
+    """Collect a record for the request handled inside the block."""
+    for alias in settings.CACHES:
+        instrument_cache(caches[alias])
+    record = {
+        'time': time.time(),
+        'method': request.method,
+        'path': request.path,
+        'view': None,
+        'status': None,
+        'total_ms': 0.0,
+        'db_queries': 0,
+        'db_ms': 0.0,
+        'cache_hits': 0,
+        'cache_misses': 0,
+        'template_ms': 0.0,
+        '_rendering': False,
+    }
+    _local.record = record
+    started = time.perf_counter()
+    try:
+        with contextlib.ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            yield record
+    finally:
+        _local.record = None
+        record['total_ms'] = (time.perf_counter() - started) * 1000
+        del record['_rendering']
+
+
+def store(record):
+    cache = caches[settings.PERF_CACHE]
+    cache.add(HEAD_KEY, 0, None)
+    try:
+        head = cache.incr(HEAD_KEY)
+    except ValueError:
+        return
+    cache.set(SLOT_KEY.format(head % settings.PERF_BUFFER_SIZE), record,
+              None)
+
+
+def recent():
+    """Buffered records, oldest first."""
+    keys = [SLOT_KEY.format(slot)
+            for slot in range(settings.PERF_BUFFER_SIZE)]
+    records = caches[settings.PERF_CACHE].get_many(keys).values()
+    return sorted(records, key=lambda record: record['time'])
+
+
+def percentile(values, share):
+    """Nearest-rank percentile of sorted values."""
+    return values[max(math.ceil(share * len(values)) - 1, 0)]
+
+
+def summary(records):
+    """Latency percentiles and average costs of each view."""
+    by_view = defaultdict(list)
+    for record in records:
+        by_view[str(record['view'])].append(record)
+    views = {}
+    for view, records in sorted(by_view.items()):
+        latencies = sorted(record['total_ms'] for record in records)
+        hits = sum(record['cache_hits'] for record in records)
+        lookups = hits + sum(record['cache_misses'] for record in records)
+        views[view] = {
+            'requests': len(records),
+            'p50_ms': percentile(latencies, 0.50),
+            'p95_ms': percentile(latencies, 0.95),
+            'p99_ms': percentile(latencies, 0.99),
+            'db_queries': sum(
+                record['db_queries'] for record in records) / len(records),
+            'db_ms': sum(record['db_ms'] for record in records) / len(records),
+            'template_ms': sum(
+                record['template_ms'] for record in records) / len(records),
+            'cache_hit_rate': hits / lookups if lookups else None,
+        }
+    return views
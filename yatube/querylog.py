@@ -0,0 +1,93 @@
+"""Slow and repeated SQL of a request.
+
+Queries are reduced to fingerprints: literals, placeholders and ``IN``
+lists are collapsed, so the same statement run for every item of a list
+counts as one fingerprint. A fingerprint repeated more than
+``QUERYLOG_DUPLICATE_LIMIT`` times in one request is reported as a
+likely N+1, a query slower than ``QUERYLOG_SLOW_MS`` is logged right
+away. Both name the view and the template line that ran the query.
+"""
+import inspect
+import logging
+import re
+import time
+from collections import Counter
+
+from django.conf import settings
+
+logger = logging.getLogger('yatube.queries')
+
+NORMALIZE = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+    (re.compile(r'\s+'), ' '),
+)
+
+
+class DuplicateQueriesError(AssertionError):
+    """Request repeated a query more than ``QUERYLOG_DUPLICATE_LIMIT``."""
+
+
+def fingerprint(sql):
+    for pattern, replacement in NORMALIZE:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()
+
+
+def template_origin():
+    """Template name and line of the node being rendered, if any."""
+    frame = inspect.currentframe()
+    while frame is not None:
+        if frame.f_code.co_name == 'render_annotated':
+            node = frame.f_locals.get('self')
+            origin = getattr(node, 'origin', None)
+            token = getattr(node, 'token', None)
+            if origin is not None and token is not None:
+                return f'{origin.template_name}:{token.lineno}'
+        frame = frame.f_back
+    return None
+
+
+class QueryLog:
+    """Execute wrapper watching the queries of one request."""
+
+    def __init__(self, request):
+        self.request = request
+        self.counts = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - started) * 1000
+            key = fingerprint(sql)
+            self.counts[key] += 1
+            if self.counts[key] == 2:
+                self.origins[key] = template_origin()
+            if elapsed >= settings.QUERYLOG_SLOW_MS:
+                logger.warning('Slow query %.1fms in %s (%s): %s',
+                               elapsed, self.view,
+                               template_origin() or 'view code', sql)
+
+    @property
+    def view(self):
+        match = getattr(self.request, 'resolver_match', None)
+        return match.view_name if match else self.request.path
+
+    def duplicates(self):
+        """Fingerprints over the limit with their counts."""
+        return [(key, count) for key, count in self.counts.most_common()
+                if count > settings.QUERYLOG_DUPLICATE_LIMIT]
+
+    def report(self):
+        """Log repeated queries, or fail with them in test mode."""
+        for key, count in self.duplicates():
+            message = (f'{count} similar queries in {self.view} '
+                       f'({self.origins.get(key) or "view code"}): {key}')
+            if settings.QUERYLOG_RAISE:
+                raise DuplicateQueriesError(message)
+            logger.warning(message)
@@ -0,0 +1,73 @@
+"""Routing of reads to replicas of the default database.
+
+Replicas are read only inside ``replica_reads()``, which the replica
+middleware enters for ``REPLICA_VIEWS``. Everything else, and every
+write, goes to the primary. A request that wrote anything pins its
+client to the primary for ``REPLICA_PIN_SECONDS``, so users see their
+own changes before the replicas catch up. Pages rendered from a replica
+may predate the feed version they are cached under, so they are cached
+for ``REPLICA_CACHE_TIMEOUT`` at most.
+"""
+import contextlib
+import random
+import threading
+
+from django.conf import settings
+
+PIN_COOKIE = 'primary_pin'
+
+# Apps of the database cache, its entries must never be read stale and
+# writing them is no change of content.
+PRIMARY_APPS = {'django_cache'}
+
+_state = threading.local()
+
+
+@contextlib.contextmanager
+def replica_reads():
+    _state.replica = True
+    try:
+        yield
+    finally:
+        _state.replica = False
+
+
+def cache_timeout(timeout):
+    """Timeout for caching content rendered by the current request."""
+    if getattr(_state, 'replica', False) and settings.DATABASE_REPLICAS:
+        if timeout is None:
+            return settings.REPLICA_CACHE_TIMEOUT
+        return min(timeout, settings.REPLICA_CACHE_TIMEOUT)
+    return timeout
+
+
+@contextlib.contextmanager
+def track_writes():
+    """Yield a list that gets an item once anything is written."""
+    _state.writes = writes = []
+    try:
+        yield writes
+    finally:
+        _state.writes = None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (getattr(_state, 'replica', False)
+                and settings.DATABASE_REPLICAS
+                and model._meta.app_label not in PRIMARY_APPS):
+            return random.choice(settings.DATABASE_REPLICAS)
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        writes = getattr(_state, 'writes', None)
+        if writes is not None and model._meta.app_label not in PRIMARY_APPS:
+            writes.append(model)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas copy the schema along with the data.
+        return db not in settings.DATABASE_REPLICAS
@@ -16,6 +16,61 @@ ALLOWED_HOSTS = [
 
 PAGINATION_PER_PAGE = 7
 
+# Trending: weight of an event halves every TRENDING_HALF_LIFE seconds.
+TRENDING_HALF_LIFE = 24 * 60 * 60
+TRENDING_POST_WEIGHT = 1
+TRENDING_COMMENT_WEIGHT = 1
+TRENDING_FOLLOW_WEIGHT = 2
+
+# Latest posts of an author that a new follower makes more popular.
+TRENDING_FOLLOW_POSTS = 10
+
+# Most active authors listed for every group in the directory.
+GROUP_TOP_AUTHORS = 3
+
+# Comments shown under a post and loaded by every "show more".
+COMMENTS_PER_PAGE = 50
+
+# Run background jobs inside the request instead of queueing them.
+JOBS_EAGER = False
+
+JOBS_MAX_ATTEMPTS = 5
+
+# A running job not finished in this many seconds is taken for one whose
+# worker died and is run again. Keep it above the longest job.
+JOBS_LEASE_SECONDS = 15 * 60
+
+# Seconds an idle worker sleeps before polling the queue again.
+JOBS_POLL_INTERVAL = 1
+
+# Renditions made when a post image is saved, largest first.
+THUMBNAIL_SIZES = ('960x700', '480x350', '240x175')
+
+# Subscription feeds keep this many latest posts per user.
+TIMELINE_LENGTH = 500
+
+# Posts of authors with more followers are read on request, not fanned out.
+TIMELINE_FANOUT_LIMIT = 1000
+
+# Fan-out to more followers than this goes to the job queue.
+TIMELINE_SYNC_FANOUT = 100
+
+# Followers a post is delivered to, and whose timelines are trimmed, at once.
+TIMELINE_DELIVERY_BATCH = 500
+
+# Rows fetched from the database at once while streaming an export.
+EXPORT_CHUNK_SIZE = 2000
+
+# 'fts5', 'inverted', or 'auto' to use FTS5 whenever SQLite has it.
+SEARCH_BACKEND = 'auto'
+
+# Comments reach the search index after this many seconds; all comments
+# of a post made meanwhile are indexed at once.
+SEARCH_REINDEX_DELAY = 30
+
+# Search ranks at most this many posts per query.
+SEARCH_MAX_RESULTS = 1000
+
 LOGIN_URL = '/auth/login/'
 
 LOGIN_REDIRECT_URL = 'index'
@@ -33,20 +88,91 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'sorl.thumbnail',
-    'debug_toolbar',
 ]
 
 MIDDLEWARE = [
+    'yatube.middleware.PerformanceMiddleware',
+    'yatube.middleware.QueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'yatube.middleware.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
+    'yatube.middleware.AnonymousPageCacheMiddleware',
+]
+
+# The toolbar is left out entirely unless DEBUG is on and it is not
+# switched off with YATUBE_DEBUG_TOOLBAR=0.
+DEBUG_TOOLBAR = DEBUG and os.environ.get('YATUBE_DEBUG_TOOLBAR', '1') == '1'
+
+if DEBUG_TOOLBAR:
+    INSTALLED_APPS.append('debug_toolbar')
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('yatube.middleware.AnonymousPageCacheMiddleware'),
+        'debug_toolbar.middleware.DebugToolbarMiddleware')
+
+# Record timings of requests into a ring buffer in this cache. Off unless
+# switched on with YATUBE_PERF_RECORD=1, as every recorded request writes
+# to the shared cache.
+PERF_RECORD = os.environ.get('YATUBE_PERF_RECORD') == '1'
+
+PERF_CACHE = 'default'
+
+PERF_BUFFER_SIZE = 1000
+
+# Share of requests recorded, YATUBE_PERF_SAMPLE_RATE=1 records them all.
+PERF_SAMPLE_RATE = float(os.environ.get('YATUBE_PERF_SAMPLE_RATE', '0.01'))
+
+# Watch requests for slow and repeated queries.
+QUERYLOG = True
+
+QUERYLOG_SLOW_MS = 100
+
+# More runs of one statement per request are reported as an N+1.
+QUERYLOG_DUPLICATE_LIMIT = 10
+
+# Raise instead of logging repeated queries, the test runner turns it on.
+QUERYLOG_RAISE = False
+
+TEST_RUNNER = 'yatube.test_runner.TestRunner'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'yatube.queries': {'handlers': ['console'], 'level': 'WARNING'},
+    },
+}
+
+# Pages served to anonymous visitors from cache.
+ANONYMOUS_PAGE_CACHE_VIEWS = [
+    'index',
+    'trending',
+    'groups',
+    'group_posts',
+    'profile',
+    'post',
+    'post_comments',
+    'search',
+    'about:author',
+    'about:tech',
 ]
 
+# Bounds the footer year and other content not tracked by signals.
+ANONYMOUS_PAGE_CACHE_TIMEOUT = 60 * 60
+
+# Cards are keyed by their content, old ones only wait to expire.
+CARD_CACHE_TIMEOUT = 24 * 60 * 60
+
+# Bounds how long a lost invalidation can show a stale follow button.
+FOLLOWING_CACHE_TIMEOUT = 24 * 60 * 60
+
 INTERNAL_IPS = [
     '127.0.0.1',
 ]
@@ -69,6 +195,8 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'yatube.context_processors.year',
+                'yatube.context_processors.following',
+                'yatube.context_processors.fragment_cache',
             ],
         },
     },
@@ -84,6 +212,60 @@ DATABASES = {
     }
 }
 
+# Pragmas set on every new SQLite connection.
+SQLITE_PRAGMAS = {}
+
+# YATUBE_SQLITE_PRODUCTION=1 lets readers work alongside a writer (WAL)
+# and keeps connections open between requests.
+SQLITE_PRODUCTION = os.environ.get('YATUBE_SQLITE_PRODUCTION') == '1'
+
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': 256 * 1024 * 1024,
+    # Negative sizes are in KiB.
+    'cache_size': -64 * 1024,
+    'busy_timeout': 5000,
+    'temp_store': 'MEMORY',
+}
+
+# Path of a copy of the SQLite database kept up to date from outside,
+# reads of REPLICA_VIEWS go there.
+if os.environ.get('YATUBE_DB_REPLICA'):
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ['YATUBE_DB_REPLICA'],
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_REPLICAS = [alias for alias in DATABASES if alias != 'default']
+
+DATABASE_ROUTERS = ['yatube.routers.ReplicaRouter']
+
+REPLICA_VIEWS = [
+    'index',
+    'trending',
+    'groups',
+    'group_posts',
+    'profile',
+    'post',
+    'post_comments',
+    'follow_index',
+    'api_posts',
+    'api_comments',
+]
+
+# After a write the user reads from the primary for this long.
+REPLICA_PIN_SECONDS = 10
+
+# Seconds pages and feed fragments rendered from a replica stay cached.
+REPLICA_CACHE_TIMEOUT = 10
+
+if SQLITE_PRODUCTION:
+    SQLITE_PRAGMAS = SQLITE_PRODUCTION_PRAGMAS
+    for database in DATABASES.values():
+        database['CONN_MAX_AGE'] = 600
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -126,8 +308,38 @@ EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
-CACHES = {
-    'default': {
+# locmem is private to a process and is the stand-in for tests;
+# the other backends are shared by all workers.
+CACHE_BACKENDS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'db': {
+        'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+        'LOCATION': 'yatube_cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    },
+    'memcached': {
+        'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+        'LOCATION': '127.0.0.1:11211',
+    },
+    'redis': {
+        'BACKEND': 'django_redis.cache.RedisCache',
+        'LOCATION': 'redis://127.0.0.1:6379/1',
+    },
 }
+
+CACHE_BACKEND = os.environ.get('YATUBE_CACHE', 'locmem')
+
+CACHES = {
+    'default': dict(CACHE_BACKENDS[CACHE_BACKEND]),
+}
+
+if os.environ.get('YATUBE_CACHE_LOCATION'):
+    CACHES['default']['LOCATION'] = os.environ['YATUBE_CACHE_LOCATION']
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+# Tests fail when a view falls into an N+1 query pattern. Replica reads
+# are off, since replicas cannot see data of a test's transaction. The
+# root conftest.py applies the same settings under pytest.
+TEST_SETTINGS = {
+    'QUERYLOG_RAISE': True,
+    'DATABASE_REPLICAS': [],
+}
+
+
+class TestRunner(DiscoverRunner):
+    """Test runner with project specific checks and settings."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        for name, value in TEST_SETTINGS.items():
+            setattr(settings, name, value)
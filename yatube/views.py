@@ -0,0 +1,18 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+from yatube import perf
+
+
+@staff_member_required
+def perf_stats(request):
+    """Per-view summary and the latest raw records of the perf buffer."""
+    records = perf.recent()
+    try:
+        limit = int(request.GET.get('limit', 100))
+    except ValueError:
+        limit = 100
+    return JsonResponse({
+        'views': perf.summary(records),
+        'recent': records[-limit:] if limit > 0 else [],
+    })